@@ -0,0 +1,117 @@
+'''
+Benchmark runner for the bill parser on synthetic bills.
+
+    python -m benchmarks.run --sizes 1,100,10000 --version v2 --lines 8 --noise 20
+
+Each scenario runs in a fresh process so peak memory is its own. The
+parse_file scenario parses the bills one after another in that process;
+parse_directory runs the batch engine over the whole folder with --workers
+processes. Both report time per stage from ParseMetrics.
+'''
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from benchmarks.synthetic_bills import write_bills
+
+def peak_rss_mb(who) -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(scenario: str, directory: str, workers: int) -> dict:
+    from verizon_bill_parser import parser
+    from verizon_bill_parser.metrics import STAGES, ParseMetrics
+
+    paths = sorted(os.path.join(directory, name) for name in os.listdir(directory))
+    result = {"scenario": scenario, "bills": len(paths), "workers": 1}
+    metrics = ParseMetrics()
+    start = time.perf_counter()
+    if scenario == "parse_file":
+        for path in paths:
+            parser.parse_file(path, metrics=metrics)
+    else:
+        result["workers"] = workers
+        parser.parse_directory(directory, workers=workers, metrics=metrics)
+    result["wall_s"] = time.perf_counter() - start
+    result["bills_per_s"] = len(paths) / result["wall_s"]
+    result["peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_SELF)
+    result["peak_worker_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    result["stages_ms_per_bill"] = {
+        stage: metrics.stage_seconds[stage] * 1000 / len(paths) for stage in STAGES
+    }
+    return result
+
+
+def prepare_bills(work_dir: str, count: int, args) -> str:
+    '''
+    Generate the bills for one size, reusing a previous run's folder when
+    the generator settings are the same.
+    '''
+    dated = "dated" if args.dated else "upload"
+    directory = os.path.join(
+        work_dir, f"{args.version}-{dated}-l{args.lines}-p{args.pages}-n{args.noise}-{count}"
+    )
+    if not os.path.isdir(directory) or len(os.listdir(directory)) != count:
+        write_bills(directory, count, version=args.version, dated=args.dated,
+                    lines=args.lines, pages=args.pages, noise=args.noise)
+    return directory
+
+
+def format_result(result: dict) -> str:
+    line = (
+        f"{result['scenario']:<16}{result['bills']:>7}{result['workers']:>8}"
+        f"{result['wall_s']:>10.2f}{result['bills_per_s']:>10.1f}"
+        f"{result['peak_rss_mb']:>10.1f}{result['peak_worker_rss_mb']:>10.1f}"
+    )
+    stages = result.get("stages_ms_per_bill")
+    if stages:
+        line += "  " + " ".join(f"{stage}={ms:.2f}" for stage, ms in stages.items() if ms)
+    return line
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", default="1,100,10000", help="comma separated bill counts")
+    arg_parser.add_argument("--version", choices=["v1", "v2"], default="v2")
+    arg_parser.add_argument("--lines", type=int, default=6, help="line summary rows per bill")
+    arg_parser.add_argument("--pages", type=int, default=None, help="pages per bill")
+    arg_parser.add_argument("--noise", type=int, default=10, help="noise text boxes per page")
+    arg_parser.add_argument("--dated", action="store_true",
+                            help="name bills MyBill_MM.DD.YYYY.pdf instead of forcing content detection")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--scenarios", default="parse_file,parse_directory")
+    arg_parser.add_argument("--work-dir", default=os.path.join("benchmarks", ".bills"))
+    arg_parser.add_argument("--json", help="also write the results to this file")
+    args = arg_parser.parse_args(argv)
+    if args.pages is None:
+        args.pages = 1 if args.version == "v1" else 3
+    if args.version == "v1":
+        args.dated = True
+
+    print(f"{'scenario':<16}{'bills':>7}{'workers':>8}{'wall s':>10}{'bills/s':>10}"
+          f"{'rss MB':>10}{'wkr MB':>10}  stage ms/bill")
+    results = []
+    spawn = get_context("spawn")
+    for count in (int(size) for size in args.sizes.split(",")):
+        directory = prepare_bills(args.work_dir, count, args)
+        for scenario in args.scenarios.split(","):
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                result = executor.submit(run_scenario, scenario, directory, args.workers).result()
+            print(format_result(result), flush=True)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#Synthetic Verizon-like bill PDFs for benchmarks and tests
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+# Standard 14 font, so pdfminer needs no embedded font program or widths.
+FONT_SIZE = 9
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+
+FIRST_NAMES = ["Alex", "Jordan", "Sam", "Taylor", "Morgan", "Casey", "Riley", "Jamie"]
+LAST_NAMES = ["Smith", "Garcia", "Nguyen", "Patel", "Brown", "Kim", "Lopez", "Clark"]
+DEVICES = ["Apple iPhone 15", "Samsung Galaxy S24", "Google Pixel 8", "Apple Watch Series 9"]
+NOISE_WORDS = ["Plan changed", "Perk added", "Device upgraded", "Service added", "Promo credit applied"]
+
+# Vertical room taken by one line-summary row (name, device, phone) and
+# the y coordinates the v1/v2 summary tables start and stop at.
+V2_ROW_HEIGHT = 50
+V1_ROW_HEIGHT = 30
+TABLE_TOP = 680
+TABLE_BOTTOM = 120
+
+
+@dataclass
+class SyntheticBill:
+    version: str
+    pdf: bytes
+    # Rows parse_file is expected to return, in order.
+    amounts: list = field(default_factory=list)
+    billDate: str = ""
+
+    def file_name(self, dated: bool = True, index: int = None) -> str:
+        '''
+        MyBill_MM.DD.YYYY.pdf, or an upload-style name that forces content
+        based version detection. index keeps names unique in bulk runs; the
+        parser only reads the date parts of a MyBill_ name.
+        '''
+        suffix = "" if index is None else f".{index:06d}"
+        if dated:
+            return "MyBill_" + self.billDate.replace("/", ".") + suffix + ".pdf"
+        return f"upload{suffix}.pdf"
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: list) -> bytes:
+    '''
+    Write a minimal PDF. Each page is a list of (x, y, text) placed with
+    Helvetica at FONT_SIZE, one text object per entry.
+    '''
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>", None]
+    font_id, pages_id = 1, 2
+    kids = []
+    for items in pages:
+        content = "\n".join(
+            f"BT /F1 {FONT_SIZE} Tf {x} {y} Td ({_escape(text)}) Tj ET" for x, y, text in items
+        ).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        kids.append(len(objects))
+    objects[pages_id - 1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>".encode()
+    )
+    objects.append(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+    catalog_id = len(objects)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref)
+    return bytes(out)
+
+
+def _amount(rng: random.Random) -> str:
+    return f"${rng.randint(500, 25000) / 100:.2f}"
+
+
+def _cents(amount: str) -> int:
+    return int(amount[1:].replace(".", ""))
+
+
+def _noise(rng: random.Random, count: int, x_min: int, x_max: int, y_min: int = 60, y_max: int = 740) -> list:
+    return [
+        (rng.randint(x_min, x_max), rng.randint(y_min, y_max), rng.choice(NOISE_WORDS))
+        for _ in range(count)
+    ]
+
+
+def _filler_pages(rng: random.Random, count: int, noise: int) -> list:
+    return [[(40, 740, "Filler page")] + _noise(rng, noise, 40, 480) for _ in range(count)]
+
+
+def make_v2_bill(lines: int = 4, pages: int = 3, noise: int = 0, seed: int = 0,
+                 bill_date: date = date(2024, 11, 18), promo_pages: int = 0) -> SyntheticBill:
+    '''
+    A v2 (Oct 2023 onward) bill: the version detection box on page 0 and the
+    "Bill summary by line" table on page 2, with noise boxes to the right
+    of the table's x0 <= 330 limit. promo_pages are inserted before the
+    table; tables too long for one page continue on the next pages under a
+    "Bill summary by line (continued)" header.
+    '''
+    if pages < 3:
+        raise ValueError("v2 bills have at least 3 pages")
+    rng = random.Random(seed)
+    bill = SyntheticBill(version="v2", pdf=b"", billDate=bill_date.strftime("%m/%d/%Y"))
+
+    cover = [
+        (40, 740, "Your bill"),
+        (276, 239, "Bill date"), (276, 228, "Account number"), (276, 217, "Invoice number"),
+        (400, 239, bill_date.strftime("%b %d, %Y")), (400, 228, "123456789-00001"), (400, 217, "9876543210"),
+    ]
+    # Each row is a list of (x, offset below the row top, text).
+    rows = []
+    for index in range(lines):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        device = rng.choice(DEVICES)
+        phone = f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}"
+        amount = _amount(rng)
+        rows.append([(40, 0, name), (40, 11, device), (40, 27, phone), (300, 0, amount)])
+        bill.amounts.append({"amount": amount, "amountCents": _cents(amount), "name": name,
+                             "description": device, "phoneNum": phone})
+    rows.append([(40, 0, "Account-wide charges & credits"), (300, 0, "$0.00")])
+    rows.append([(40, 0, "Total:"), (300, 0, _amount(rng))])
+
+    rows_per_page = (TABLE_TOP - TABLE_BOTTOM) // V2_ROW_HEIGHT
+    summary_pages = []
+    for first_row in range(0, len(rows), rows_per_page):
+        if not summary_pages:
+            summary = [(40, 720, "Bill summary by line"), (420, 720, "Questions about your bill?")]
+        else:
+            summary = [(40, 720, "Bill summary by line (continued)")]
+        y = TABLE_TOP
+        for row in rows[first_row:first_row + rows_per_page]:
+            summary += [(x, y - offset, text) for x, offset, text in row]
+            y -= V2_ROW_HEIGHT
+        summary_pages.append(summary + _noise(rng, noise, 420, 480))
+
+    trailing = max(pages - 2 - promo_pages - len(summary_pages), 0)
+    promos = [[(40, 740, "Special offer")] + _noise(rng, noise, 40, 480) for _ in range(promo_pages)]
+    bill.pdf = build_pdf([cover] + _filler_pages(rng, 1, noise) + promos + summary_pages
+                         + _filler_pages(rng, trailing, noise))
+    return bill
+
+
+def make_v1_bill(lines: int = 4, pages: int = 1, noise: int = 0, seed: int = 0,
+                 bill_date: date = date(2022, 6, 18)) -> SyntheticBill:
+    '''
+    A 2022 (v1) bill: charges on page 0 with amounts left of the x1 <= 385
+    limit and noise boxes to the right of it.
+    '''
+    max_lines = (TABLE_TOP - TABLE_BOTTOM) // V1_ROW_HEIGHT
+    if lines > max_lines:
+        raise ValueError(f"At most {max_lines} lines fit on the summary page")
+    rng = random.Random(seed)
+    bill = SyntheticBill(version="v1", pdf=b"", billDate=bill_date.strftime("%m/%d/%Y"))
+
+    summary = [(40, 720, "."), (420, 720, "Smartphone")]
+    y = TABLE_TOP
+    for index in range(lines):
+        description = f"{rng.choice(DEVICES)} line {index + 1}"
+        amount = _amount(rng)
+        summary += [(40, y, description), (300, y, amount)]
+        bill.amounts.append({"description": description, "amount": amount, "amountCents": _cents(amount)})
+        y -= V1_ROW_HEIGHT
+    summary += _noise(rng, noise, 420, 480)
+
+    bill.pdf = build_pdf([summary] + _filler_pages(rng, pages - 1, noise))
+    return bill
+
+
+def make_bill(version: str = "v2", **kwargs) -> SyntheticBill:
+    if version == "v1":
+        return make_v1_bill(**kwargs)
+    if version == "v2":
+        return make_v2_bill(**kwargs)
+    raise ValueError(f"Unknown bill version: {version}")
+
+
+def write_bills(directory: str, count: int, version: str = "v2", dated: bool = True, **kwargs) -> list:
+    '''
+    Write count bills with distinct contents into directory and return
+    their paths. Dated bills are named after bill dates one day apart
+    (wrapping inside the version's date range); the others get upload
+    names and need content detection.
+    '''
+    if version == "v1" and not dated:
+        raise ValueError("v1 bills are only recognised by their MyBill_ file name")
+    os.makedirs(directory, exist_ok=True)
+    start = date(2022, 1, 1) if version == "v1" else date(2023, 10, 1)
+    paths = []
+    for index in range(count):
+        bill_date = start + timedelta(days=index % 330)
+        bill = make_bill(version, seed=index, bill_date=bill_date, **kwargs)
+        name = bill.file_name(dated=dated, index=index)
+        path = os.path.join(directory, name)
+        with open(path, "wb") as f:
+            f.write(bill.pdf)
+        paths.append(path)
+    return paths
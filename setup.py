@@ -2,11 +2,17 @@ from setuptools import setup, find_packages
 
 setup(
     name='verizon_bill_parser',
-    version='0.1',
+    version='0.1',  # keep in sync with verizon_bill_parser.__version__
     packages=['verizon_bill_parser'],
     install_requires=[
         'pdfminer.six'
     ],
+    entry_points={
+        'console_scripts': [
+            'verizon-bill-parser=verizon_bill_parser.cli:main',
+            'verizon-bill-parser-server=verizon_bill_parser.server:main',
+        ],
+    },
     url='https://github.com/amitrke/verizon-bill-parser',
     author='Amit Kumar',
     author_email='',
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from pathlib import Path
+
+from benchmarks import synthetic_bills
+from verizon_bill_parser import aio, batch
+
+
+def slow_parse_one(file_path, log_level, cache=None, collect_metrics=False, attach_metrics=False, data=None):
+    if file_path.endswith("slow.pdf"):
+        time.sleep(30)
+    if file_path.endswith("busy.pdf"):
+        time.sleep(1.5)
+    return batch.BillResult(fileName=file_path, parsedData={"fileName": file_path, "amounts": []})
+
+
+def test_aparse_many_yields_every_bill(tmp_path: Path):
+    paths = synthetic_bills.write_bills(str(tmp_path), 3, version="v2", dated=True, lines=2)
+    (tmp_path / "note.txt").write_text("hello")
+    bill = synthetic_bills.make_bill("v2", lines=3)
+
+    async def collect():
+        sources = paths + [str(tmp_path / "note.txt"), (bill.pdf, "upload.pdf")]
+        return [result async for result in aio.aparse_many(sources, workers=2)]
+
+    results = {result.fileName: result for result in asyncio.run(collect())}
+    assert len(results) == 5
+    assert all(results[path].ok for path in paths)
+    assert "is not a PDF file" in results[str(tmp_path / "note.txt")].error
+    assert results["upload.pdf"].parsedData["amounts"] == bill.amounts
+
+
+def test_aparse_file_accepts_bytes():
+    bill = synthetic_bills.make_bill("v2", lines=2)
+    parsed = asyncio.run(aio.aparse_file(bill.pdf, file_name=bill.file_name()))
+    assert parsed["amounts"] == bill.amounts
+    assert parsed["billDate"] == bill.billDate
+
+
+def test_timed_out_bill_is_isolated(monkeypatch):
+    monkeypatch.setattr(batch, "_parse_one", slow_parse_one)
+
+    async def run():
+        async with aio.AsyncBillParser(workers=1, timeout=0.5) as bill_parser:
+            slow = await bill_parser.parse_result("slow.pdf")
+            # The stuck worker was terminated; the next bill gets a fresh one.
+            fast = await bill_parser.parse_result("fast.pdf")
+            return slow, fast
+
+    start = time.monotonic()
+    slow, fast = asyncio.run(run())
+    assert slow.errorType == "TimeoutError"
+    assert fast.ok
+    assert time.monotonic() - start < 10
+
+
+def test_leaving_parse_many_early_cancels_pending_bills(monkeypatch):
+    monkeypatch.setattr(batch, "_parse_one", slow_parse_one)
+
+    async def first_result():
+        async with aio.AsyncBillParser(workers=1, concurrency=2) as bill_parser:
+            async for result in bill_parser.parse_many(["fast.pdf", "slow.pdf", "slow.pdf"]):
+                return result
+
+    start = time.monotonic()
+    assert asyncio.run(first_result()).fileName == "fast.pdf"
+    assert time.monotonic() - start < 10
+
+
+def test_cancelled_bill_keeps_its_slot_until_its_worker_is_free(monkeypatch):
+    monkeypatch.setattr(batch, "_parse_one", slow_parse_one)
+
+    async def run():
+        async with aio.AsyncBillParser(workers=1, timeout=1.0) as bill_parser:
+            busy = asyncio.ensure_future(bill_parser.parse_result("busy.pdf"))
+            await asyncio.sleep(0.3)
+            busy.cancel()
+            # Waits for the worker instead of spending its timeout queued behind busy.pdf.
+            return await bill_parser.parse_result("fast.pdf")
+
+    assert asyncio.run(run()).ok
@@ -0,0 +1,80 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from verizon_bill_parser import batch, parser
+
+
+def crashing_parse_one(file_path, log_level, cache=None, collect_metrics=False, attach_metrics=False):
+    if file_path.endswith("crash.pdf"):
+        os._exit(1)
+    return batch.BillResult(fileName=file_path, parsedData={"fileName": file_path, "amounts": []})
+
+
+def test_iter_parse_files_collects_errors_instead_of_raising(tmp_path: Path):
+    bad_files = [tmp_path / "b.txt", tmp_path / "a.txt"]
+    for bad_file in bad_files:
+        bad_file.write_text("hello")
+
+    results = list(batch.iter_parse_files([str(f) for f in bad_files], workers=2))
+    assert len(results) == 2
+    for result in results:
+        assert not result.ok
+        assert "is not a PDF file" in result.error
+        assert result.parsedData is None
+
+
+def test_parse_batch_sorts_results_by_file_name(tmp_path: Path, monkeypatch):
+    def fake_parse_one(file_path, log_level, cache=None, collect_metrics=False, attach_metrics=False):
+        if file_path.endswith("bad.pdf"):
+            return batch.BillResult(fileName=file_path, error="boom", errorType="Exception")
+        return batch.BillResult(fileName=file_path, parsedData={"fileName": file_path, "amounts": []})
+
+    monkeypatch.setattr(batch, "_parse_one", fake_parse_one)
+
+    report = batch.parse_batch(["c.pdf", "bad.pdf", "a.pdf", "b.pdf"], workers=1)
+    assert [r.fileName for r in report.results] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert [r.fileName for r in report.errors] == ["bad.pdf"]
+
+
+def test_parse_directory_skip_mode_drops_failed_files(tmp_path: Path):
+    (tmp_path / "note.txt").write_text("hello")
+    assert parser.parse_directory(str(tmp_path), workers=1, errors="skip") == []
+
+
+def test_iter_parse_directory_yields_results_with_errors(tmp_path: Path):
+    (tmp_path / "note.txt").write_text("hello")
+    results = list(parser.iter_parse_directory(str(tmp_path)))
+    assert len(results) == 1
+    assert results[0].fileName == str(tmp_path / "note.txt")
+    assert "is not a PDF file" in results[0].error
+
+
+def test_worker_crash_only_fails_the_bill_that_caused_it(monkeypatch):
+    monkeypatch.setattr(batch, "_parse_one", crashing_parse_one)
+
+    paths = ["a.pdf", "crash.pdf", "b.pdf", "c.pdf", "d.pdf"]
+    results = {result.fileName: result for result in batch.iter_parse_files(paths, workers=2)}
+    assert sorted(results) == sorted(paths)
+    assert results["crash.pdf"].errorType == "BrokenProcessPool"
+    assert all(results[path].ok for path in paths if path != "crash.pdf")
+
+
+def test_fail_fast_stops_at_the_first_failure(monkeypatch):
+    parsed = []
+
+    def fake_parse_one(file_path, log_level, cache=None, collect_metrics=False, attach_metrics=False):
+        parsed.append(file_path)
+        if file_path == "bad.pdf":
+            return batch.BillResult(fileName=file_path, error="gone", errorType="FileNotFoundError")
+        return batch.BillResult(fileName=file_path, parsedData={"fileName": file_path, "amounts": []})
+
+    monkeypatch.setattr(batch, "_parse_one", fake_parse_one)
+
+    report = batch.parse_batch(["a.pdf", "bad.pdf", "c.pdf"], workers=1, fail_fast=True)
+    assert parsed == ["a.pdf", "bad.pdf"]
+    with pytest.raises(FileNotFoundError, match="gone"):
+        report.errors[0].raise_error()
+    with pytest.raises(Exception, match="bad xref"):
+        batch.BillResult(fileName="x.pdf", error="bad xref", errorType="PDFSyntaxError").raise_error()
@@ -0,0 +1,88 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from verizon_bill_parser import mypdfutils
+from verizon_bill_parser.cache import ParseCache, PARSED_DATA
+
+
+def test_cache_round_trip(tmp_path: Path):
+    cache = ParseCache(str(tmp_path))
+    assert cache.get(PARSED_DATA, "ab" * 32) is None
+    cache.put(PARSED_DATA, "ab" * 32, {"amounts": []})
+    assert cache.get(PARSED_DATA, "ab" * 32) == {"amounts": []}
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path):
+    cache = ParseCache(str(tmp_path), max_bytes=250)
+    payload = {"text": "x" * 80}
+    cache.put(PARSED_DATA, "aa" * 32, payload)
+    cache.put(PARSED_DATA, "bb" * 32, payload)
+    # Make "aa" the oldest entry, then refresh it with a read so "bb" is evicted instead.
+    for key, mtime in (("aa" * 32, 1000), ("bb" * 32, 2000)):
+        path = cache._path(PARSED_DATA, key)
+        os.utime(path, (mtime, mtime))
+    assert cache.get(PARSED_DATA, "aa" * 32) == payload
+
+    cache.put(PARSED_DATA, "cc" * 32, payload)
+    assert cache.size() <= 250
+    assert cache.get(PARSED_DATA, "aa" * 32) == payload
+    assert cache.get(PARSED_DATA, "bb" * 32) is None
+
+
+def test_cache_hits_skip_layout(tmp_path: Path, fake_pdf_session):
+    layout_calls = fake_pdf_session()
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    first = mypdfutils.MyPDFUtils(str(pdf_path), cache=cache).parsedData
+    assert layout_calls == [0, 2]
+
+    # Same content under another name: served from the text-box cache.
+    copy_path = tmp_path / "copy.pdf"
+    shutil.copy(pdf_path, copy_path)
+    second = mypdfutils.MyPDFUtils(str(copy_path), cache=cache).parsedData
+    # And again: served from the parsed-data cache.
+    third = mypdfutils.MyPDFUtils(str(copy_path), cache=cache).parsedData
+
+    assert layout_calls == [0, 2]
+    assert second["fileName"] == third["fileName"] == str(copy_path)
+    assert first["amounts"] == second["amounts"] == third["amounts"]
+
+
+def test_version_from_a_file_name_is_not_reused_for_content_detection(tmp_path: Path):
+    from benchmarks import synthetic_bills
+
+    # v1 bills have no content detection, only a MyBill_ date.
+    bill = synthetic_bills.make_bill("v1", lines=2)
+    cache = ParseCache(str(tmp_path / "cache"))
+    dated_path = tmp_path / bill.file_name()
+    dated_path.write_bytes(bill.pdf)
+    assert mypdfutils.MyPDFUtils(str(dated_path), cache=cache).parsedData["amounts"] == bill.amounts
+
+    upload_path = tmp_path / "upload.pdf"
+    upload_path.write_bytes(bill.pdf)
+    for cache_or_none in (None, cache):
+        with pytest.raises(ValueError, match="Unable to determine"):
+            mypdfutils.MyPDFUtils(str(upload_path), cache=cache_or_none)
+
+
+def test_tracing_replays_the_parse_from_cached_text_boxes(tmp_path: Path, fake_pdf_session):
+    from verizon_bill_parser.trace import TraceRecorder
+
+    layout_calls = fake_pdf_session()
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    mypdfutils.MyPDFUtils(str(pdf_path), cache=cache)
+    mypdfutils.MyPDFUtils(str(pdf_path), cache=cache)
+
+    recorder = TraceRecorder()
+    parsed = mypdfutils.MyPDFUtils(str(pdf_path), cache=cache, trace=recorder).parsedData
+    assert layout_calls == [0, 2]
+    assert len(recorder.select("cache_hit_text_boxes")) == 1
+    assert [e["row"] for e in recorder.select("amount")] == [0]
+    assert parsed["amounts"][0]["amount"] == "$40.00"
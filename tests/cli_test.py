@@ -0,0 +1,74 @@
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks import synthetic_bills
+from verizon_bill_parser import cli
+
+
+def test_cli_prints_one_json_object_per_bill(tmp_path: Path, capsys: pytest.CaptureFixture):
+    paths = synthetic_bills.write_bills(str(tmp_path / "bills"), 2, version="v2", lines=2)
+    (tmp_path / "bills" / "notes.txt").write_text("not a bill")
+
+    assert cli.main([str(tmp_path / "bills"), "--workers", "1"]) == 0
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(record["fileName"] for record in records) == paths
+
+
+def test_cli_reads_paths_from_stdin_and_reports_failures(tmp_path: Path):
+    paths = synthetic_bills.write_bills(str(tmp_path), 1, version="v1")
+    output = tmp_path / "out.ndjson"
+    stdin = io.StringIO(f"{paths[0]}\n\n{tmp_path / 'missing.pdf'}\n")
+
+    assert cli.main(["-w", "1", "-o", str(output)], stdin=stdin) == 1
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert records[0]["fileName"] == paths[0]
+    assert records[1]["errorType"] == "FileNotFoundError"
+
+
+def test_cli_parses_stdin_paths_as_they_arrive(tmp_path: Path):
+    paths = synthetic_bills.write_bills(str(tmp_path), 2, version="v2", lines=2)
+    output = tmp_path / "out.ndjson"
+
+    def stdin():
+        yield f"{paths[0]}\n"
+        # The first bill is written out before the next path is read.
+        assert len(output.read_text().splitlines()) == 1
+        yield f"{paths[1]}\n"
+
+    assert cli.main(["-w", "1", "-o", str(output)], stdin=stdin()) == 0
+    assert [json.loads(line)["fileName"] for line in output.read_text().splitlines()] == paths
+
+
+def test_cli_exits_quietly_when_the_reader_goes_away(tmp_path: Path):
+    paths = synthetic_bills.write_bills(str(tmp_path), 1, version="v2", lines=2)
+    process = subprocess.Popen([sys.executable, "-m", "verizon_bill_parser.cli", "-w", "1", paths[0]],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               cwd=Path(__file__).resolve().parents[1])
+    process.stdout.close()
+    assert process.wait(timeout=60) == 1
+    assert process.stderr.read() == b""
+    process.stderr.close()
+
+
+def test_help_does_not_import_pdfminer():
+    code = (
+        "import sys\n"
+        "from verizon_bill_parser import cli\n"
+        "try:\n"
+        "    cli.main(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "assert not any(m.startswith('pdfminer') for m in sys.modules), 'pdfminer imported'\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True,
+                   cwd=Path(__file__).resolve().parents[1])
+
+
+def test_cli_watch_requires_a_single_directory(tmp_path: Path):
+    with pytest.raises(SystemExit):
+        cli.main(["--watch", str(tmp_path), str(tmp_path)])
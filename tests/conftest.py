@@ -0,0 +1,47 @@
+import pytest
+
+from verizon_bill_parser import mypdfutils
+from verizon_bill_parser.textbox import TextBox
+
+# Text boxes of a small v2 bill: the detection box on page 0 and the line summary on page 2.
+V2_PAGES = {
+    0: [TextBox("Bill date\nAccount number\nInvoice number\n", 276, 215, 342, 248)],
+    2: [
+        TextBox("Bill summary by line\n", 40, 718, 120, 727),
+        TextBox("Questions about your bill?\n", 420, 718, 524, 727),
+        TextBox("Alex Smith\nApple iPhone 15\n", 40, 667, 106, 689),
+        TextBox("555-123-4560\n", 40, 651, 96, 660),
+        TextBox("$40.00\n", 300, 678, 328, 687),
+        TextBox("Total:\n", 40, 478, 63, 487),
+        TextBox("$40.00\n", 300, 478, 328, 487),
+    ],
+}
+
+
+@pytest.fixture
+def fake_pdf_session(monkeypatch: pytest.MonkeyPatch):
+    '''
+    Replace PdfSession with an in-memory fake serving the given pages.
+    Returns an installer; the list it returns records laid out pages.
+    '''
+    def install(pages=V2_PAGES, scanned=None):
+        layout_calls = []
+
+        class FakeSession:
+            def __init__(self, pdf_file_name, metrics=None, data=None):
+                pass
+
+            def text_boxes(self, page_number, keep=True):
+                layout_calls.append(page_number)
+                return pages.get(page_number)
+
+            def scan_lines(self, page_number):
+                return (scanned or {}).get(page_number)
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(mypdfutils, "PdfSession", FakeSession)
+        return layout_calls
+
+    return install
@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+from verizon_bill_parser.amounts import amount_to_cents
+from verizon_bill_parser.ledger import Ledger
+
+
+def bill(file_name, bill_date, rows):
+    return {
+        "fileName": file_name,
+        "billDate": bill_date,
+        "amounts": [
+            {"amount": amount, "amountCents": amount_to_cents(amount), "name": name, "phoneNum": phone,
+             "description": "Apple iPhone 15"}
+            for name, phone, amount in rows
+        ],
+    }
+
+
+BILLS = [
+    bill("MyBill_10.18.2024.pdf", "10/18/2024", [("Alex Smith", "555-123-4560", "$40.00"),
+                                                 ("Sam Kim", "555-123-4561", "$25.50")]),
+    bill("MyBill_11.18.2024.pdf", "11/18/2024", [("Alex Smith", "555-123-4560", "$41.00"),
+                                                 ("Sam Kim", "555-123-4561", None)]),
+    # Parsed before amountCents existed, and without a bill date.
+    {"fileName": "upload.pdf", "amounts": [{"amount": "$1,000.00", "description": "Line 1"}]},
+]
+
+
+@pytest.mark.parametrize(
+    "text, cents",
+    [("$45.00", 4500), ("-$5.00", -500), ("($5.00)", -500), ("$1,234.50", 123450), ("Total:", None), (None, None)],
+)
+def test_amount_to_cents(text, cents):
+    assert amount_to_cents(text) == cents
+
+
+def test_ledger_group_by():
+    ledger = Ledger.from_bills(BILLS)
+    assert len(ledger) == 4
+    assert ledger.total_cents() == 4000 + 2550 + 4100 + 100000
+    assert ledger.group_by("line") == {"555-123-4560": 8100, "555-123-4561": 2550, None: 100000}
+    assert list(ledger.group_by("month").items()) == [(None, 100000), ("2024-10", 6550), ("2024-11", 4100)]
+    assert ledger.group_by("bill")["MyBill_11.18.2024.pdf"] == 4100
+    assert ledger.group_by("name", "month")[("Alex Smith", "2024-11")] == 4100
+    with pytest.raises(ValueError):
+        ledger.group_by("year")
+
+
+def test_ledger_columns_and_csv():
+    ledger = Ledger.from_bills(BILLS)
+    columns = ledger.columns()
+    assert columns["billDate"] == ["2024-10-18", "2024-10-18", "2024-11-18", None]
+    assert columns["amountCents"] == [4000, 2550, 4100, 100000]
+
+    out = io.StringIO()
+    ledger.to_csv(out)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == "fileName,billDate,phoneNum,name,description,amountCents"
+    assert lines[-1] == "upload.pdf,,,,Line 1,100000"
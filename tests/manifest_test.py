@@ -0,0 +1,89 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks import synthetic_bills
+from verizon_bill_parser import batch, parser
+from verizon_bill_parser.manifest import BillManifest
+
+
+def test_incremental_parse_only_parses_new_and_changed_bills(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    bills = tmp_path / "bills"
+    paths = synthetic_bills.write_bills(str(bills / "2024"), 2, version="v2", lines=2)
+    paths += synthetic_bills.write_bills(str(bills), 1, version="v2", dated=False, lines=3)
+    (bills / "notes.txt").write_text("not a bill")
+    manifest_path = str(tmp_path / "manifest.sqlite")
+
+    parsed_paths = []
+    iter_parse_files = parser.iter_parse_files
+
+    def recording_iter_parse_files(file_paths, **kwargs):
+        file_paths = list(file_paths)
+        parsed_paths.extend(file_paths)
+        return iter_parse_files(file_paths, **kwargs)
+
+    monkeypatch.setattr(parser, "iter_parse_files", recording_iter_parse_files)
+
+    first = parser.parse_directory_incremental(str(bills), manifest_path, workers=1)
+    assert sorted(parsed_paths) == sorted(paths)
+    assert [bill["fileName"] for bill in first] == sorted(paths)
+
+    # Nothing changed, and a touched file with the same content is not parsed again.
+    parsed_paths.clear()
+    os.utime(paths[0], ns=(0, 1_000_000_000))
+    assert parser.parse_directory_incremental(str(bills), manifest_path, workers=1) == first
+    assert parsed_paths == []
+
+    # A new bill and a rewritten one are parsed; a deleted one is forgotten.
+    replacement = synthetic_bills.make_bill("v2", lines=4, seed=99)
+    Path(paths[2]).write_bytes(replacement.pdf)
+    added = synthetic_bills.write_bills(str(bills / "2025"), 1, version="v2", lines=2)
+    os.remove(paths[1])
+    third = parser.parse_directory_incremental(str(bills), manifest_path, workers=1)
+    assert sorted(parsed_paths) == sorted([paths[2]] + added)
+    assert len(third) == 3
+    assert next(b for b in third if b["fileName"] == paths[2])["amounts"] == replacement.amounts
+    with BillManifest(manifest_path) as manifest:
+        assert len(manifest) == 3
+
+
+def test_walk_pdfs_skips_other_files(tmp_path: Path):
+    (tmp_path / "sub").mkdir()
+    for name in ("b.pdf", "a.txt", "sub/c.pdf"):
+        (tmp_path / name).write_bytes(b"%PDF-1.4\n")
+    found = [path for path, stat in parser.walk_pdfs(str(tmp_path))]
+    assert found == [str(tmp_path / "b.pdf"), str(tmp_path / "sub" / "c.pdf")]
+    assert [path for path, stat in parser.walk_pdfs(str(tmp_path), recursive=False)] == [str(tmp_path / "b.pdf")]
+
+
+def test_non_recursive_run_keeps_subdirectory_entries(tmp_path: Path):
+    bills = tmp_path / "bills"
+    synthetic_bills.write_bills(str(bills), 1, version="v2", lines=2)
+    synthetic_bills.write_bills(str(bills / "2024"), 1, version="v2", lines=2, dated=False)
+    manifest_path = str(tmp_path / "manifest.sqlite")
+
+    assert len(parser.parse_directory_incremental(str(bills), manifest_path, workers=1)) == 2
+    assert len(parser.parse_directory_incremental(str(bills) + "/", manifest_path, workers=1,
+                                                  recursive=False)) == 1
+    with BillManifest(manifest_path) as manifest:
+        assert len(manifest) == 2
+
+
+def test_failed_bills_are_parsed_again_on_the_next_run(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    paths = synthetic_bills.write_bills(str(tmp_path / "bills"), 1, version="v2", lines=2)
+    manifest_path = str(tmp_path / "manifest.sqlite")
+    parse_one = batch._parse_one
+
+    def killed_parse_one(file_path, *args, **kwargs):
+        return batch.BillResult(fileName=file_path, error="A process in the process pool was terminated abruptly",
+                                errorType="BrokenProcessPool")
+
+    monkeypatch.setattr(batch, "_parse_one", killed_parse_one)
+    assert parser.parse_directory_incremental(str(tmp_path / "bills"), manifest_path, workers=1, errors="skip") == []
+    with BillManifest(manifest_path) as manifest:
+        assert len(manifest) == 0
+
+    monkeypatch.setattr(batch, "_parse_one", parse_one)
+    bills = parser.parse_directory_incremental(str(tmp_path / "bills"), manifest_path, workers=1)
+    assert [bill["fileName"] for bill in bills] == paths
@@ -0,0 +1,61 @@
+import time
+from pathlib import Path
+
+from verizon_bill_parser import mypdfutils
+from verizon_bill_parser.metrics import ParseMetrics
+
+
+def test_stage_times_are_exclusive():
+    metrics = ParseMetrics()
+    with metrics.stage("version"):
+        with metrics.stage("layout"):
+            time.sleep(0.02)
+    assert metrics.stage_seconds["layout"] >= 0.02
+    assert metrics.stage_seconds["version"] < metrics.stage_seconds["layout"]
+
+
+def test_parse_counts_skips_and_merges(tmp_path: Path, fake_pdf_session):
+    fake_pdf_session()
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+
+    metrics = ParseMetrics()
+    mypdfutils.MyPDFUtils(str(pdf_path), metrics=metrics)
+    assert metrics.bills == 1
+    assert metrics.pages_parsed == 1
+    assert metrics.skips["x0_limit"] == 1
+    assert metrics.skips["v2_total_label"] == 1
+    assert metrics.events["context_open"] == 1
+    assert {"open", "version", "extract", "parse"} <= set(metrics.stage_seconds)
+
+    total = ParseMetrics().merge(metrics.to_dict()).merge(metrics)
+    assert total.bills == 2
+    assert total.elements_per_page[2] == 2 * metrics.elements_per_page[2]
+    assert total.skips["v2_total_label"] == 2
+
+
+def test_openmetrics_output():
+    metrics = ParseMetrics()
+    metrics.bills = 3
+    metrics.skips["skip_list"] = 2
+    text = metrics.to_openmetrics()
+    lines = text.splitlines()
+    assert "# TYPE verizon_bill_parser_bills counter" in lines
+    assert "verizon_bill_parser_bills_total 3" in lines
+    assert 'verizon_bill_parser_skipped_elements_total{reason="skip_list"} 2' in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_parse_file_attaches_metrics(tmp_path: Path):
+    from benchmarks import synthetic_bills
+    from verizon_bill_parser import parser
+
+    bill = synthetic_bills.make_bill("v2", lines=3, noise=5)
+    pdf_path = tmp_path / bill.file_name(dated=False)
+    pdf_path.write_bytes(bill.pdf)
+
+    total = ParseMetrics()
+    result = parser.parse_file(str(pdf_path), metrics=total, attach_metrics=True)
+    assert result["amounts"] == bill.amounts
+    assert result["metrics"]["bills"] == total.bills == 1
+    assert result["metrics"]["stageSeconds"]["layout"] > 0
@@ -0,0 +1,126 @@
+import dataclasses
+from pathlib import Path
+
+import pytest
+
+from verizon_bill_parser import mypdfutils
+from verizon_bill_parser.metrics import ParseMetrics
+from verizon_bill_parser.profiles import get_profile
+from verizon_bill_parser.textbox import TextBox
+
+from conftest import V2_PAGES
+
+
+def test_parse_stops_once_all_contexts_are_closed(tmp_path: Path, fake_pdf_session, monkeypatch: pytest.MonkeyPatch):
+    profile = dataclasses.replace(get_profile("v2"), pages_to_parse=(2, 3))
+    monkeypatch.setattr(mypdfutils, "get_profile", lambda name: profile)
+    summary = V2_PAGES[2][:5] + [TextBox("abcd\n", 40, 600, 60, 609), TextBox("$99.00\n", 300, 590, 328, 599)]
+    layout_calls = fake_pdf_session({0: V2_PAGES[0], 2: summary, 3: [TextBox("Filler\n", 40, 700, 70, 709)]})
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+
+    metrics = ParseMetrics()
+    parsed = mypdfutils.MyPDFUtils(str(pdf_path), metrics=metrics).parsedData
+
+    assert [row["amount"] for row in parsed["amounts"]] == ["$40.00"]
+    # Page 3 is never laid out and the box after the final marker is never visited.
+    assert layout_calls == [0, 2]
+    assert metrics.elements_per_page[2] == 6
+    assert metrics.events["parse_done"] == 1
+
+
+def test_summary_pages_are_located_from_the_content_stream(tmp_path: Path):
+    from benchmarks import synthetic_bills
+    from verizon_bill_parser.cache import PAGE_INDEX, ParseCache
+
+    # Two promo pages push the table to page 4, and 20 lines continue it on page 5.
+    bill = synthetic_bills.make_bill("v2", lines=20, promo_pages=2, pages=8, noise=10)
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(bill.pdf)
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    metrics = ParseMetrics()
+    utils = mypdfutils.MyPDFUtils(str(pdf_path), cache=cache, metrics=metrics)
+    assert utils.parsedData["amounts"] == bill.amounts
+    # Page 2, where the table usually is, is laid out first.
+    assert sorted(metrics.elements_per_page) == [2, 4, 5]
+    assert metrics.skips["header_repeat"] == 1
+    assert cache.get(PAGE_INDEX, utils._text_boxes_key) == {"pages": [4, 5]}
+
+
+def test_locator_costs_nothing_when_the_table_is_where_expected(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from benchmarks import synthetic_bills
+
+    bill = synthetic_bills.make_bill("v2", lines=8, pages=6, noise=20)
+    pdf_path = tmp_path / bill.file_name()
+    pdf_path.write_bytes(bill.pdf)
+    located = get_profile("v2")
+    assert located.locate_pages
+    runs = {}
+    for profile in (located, dataclasses.replace(located, locate_pages=False)):
+        monkeypatch.setattr(mypdfutils, "get_profile", lambda name: profile)
+        metrics = ParseMetrics()
+        runs[profile.locate_pages] = mypdfutils.MyPDFUtils(str(pdf_path), metrics=metrics).parsedData, metrics
+
+    (located_data, located_metrics), (fixed_data, fixed_metrics) = runs[True], runs[False]
+    assert located_data == fixed_data
+    assert located_data["amounts"] == bill.amounts
+    # The same pages are laid out as on the fixed-page path, and no page is scanned.
+    assert located_metrics.elements_per_page == fixed_metrics.elements_per_page
+    assert "scan" not in located_metrics.stage_seconds
+    assert "locate" not in located_metrics.stage_seconds
+
+
+def test_table_continues_onto_the_next_page(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from benchmarks import synthetic_bills
+
+    # 20 lines run the table from page 2 onto page 3, which repeats the header.
+    bill = synthetic_bills.make_bill("v2", lines=20, pages=6)
+    pdf_path = tmp_path / bill.file_name()
+    pdf_path.write_bytes(bill.pdf)
+    scanned = []
+    page_has_header = mypdfutils.MyPDFUtils._page_has_header
+    monkeypatch.setattr(mypdfutils.MyPDFUtils, "_page_has_header",
+                        lambda self, page: scanned.append(page) or page_has_header(self, page))
+
+    metrics = ParseMetrics()
+    assert mypdfutils.MyPDFUtils(str(pdf_path), metrics=metrics).parsedData["amounts"] == bill.amounts
+    # Page 4 is neither scanned nor laid out once the total row has been read.
+    assert scanned == [3]
+    assert sorted(metrics.elements_per_page) == [2, 3]
+
+
+def test_header_split_over_text_boxes_opens_its_context(tmp_path: Path, fake_pdf_session):
+    split = [TextBox("Bill summary\n", 40, 718, 90, 727), TextBox("by  line\n", 92, 718, 120, 727)]
+    fake_pdf_session({0: V2_PAGES[0], 2: split + V2_PAGES[2][1:5] + [TextBox("abcd\n", 40, 600, 60, 609)]})
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+
+    utils = mypdfutils.MyPDFUtils(str(pdf_path))
+    assert [row["amount"] for row in utils.parsedData["amounts"]] == ["$40.00"]
+    # A closed context is not opened again by its header.
+    assert utils._advance_header_states("Bill summary") is None
+    assert utils._advance_header_states("by line") is None
+
+
+@pytest.mark.parametrize("pages, expected_layout_calls", [
+    # A page before the table that repeats the header is not pulled into it.
+    ({1: [TextBox("Bill summary by line\n", 40, 718, 120, 727), TextBox("$12.00\n", 300, 678, 328, 687)],
+      2: V2_PAGES[2]}, [0, 2]),
+    # A page that only mentions the header is passed over for the real table.
+    ({2: [TextBox("Filler\n", 40, 700, 70, 709)],
+      3: [TextBox("Bill summary by line .......... 4\n", 40, 718, 200, 727)],
+      4: V2_PAGES[2]}, [0, 2, 3, 4]),
+])
+def test_table_pages_start_where_the_context_opens(tmp_path: Path, fake_pdf_session, pages, expected_layout_calls):
+    from verizon_bill_parser.pdfsession import ScannedLine
+
+    scanned = {page: [ScannedLine(box.text.strip(), box.x0, box.y0) for box in boxes] for page, boxes in pages.items()}
+    scanned.update({page: [] for page in range(5) if page not in pages})
+    layout_calls = fake_pdf_session({0: V2_PAGES[0], **pages}, scanned)
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+
+    parsed = mypdfutils.MyPDFUtils(str(pdf_path)).parsedData
+    assert [row["amount"] for row in parsed["amounts"]] == ["$40.00"]
+    assert layout_calls == expected_layout_calls
@@ -1,3 +1,4 @@
+import io
 import os
 from pathlib import Path
 
@@ -42,7 +43,7 @@ def test_parse_file_uses_mypdfutils_and_returns_parsed_data(tmp_path: Path, monk
     captured = {}
 
     class FakeMyPDFUtils:
-        def __init__(self, pdf_file_name, log_level):
+        def __init__(self, pdf_file_name, log_level, cache=None, trace=None, metrics=None, data=None):
             captured["pdf_file_name"] = pdf_file_name
             captured["log_level"] = log_level
             self.parsedData = {"fileName": pdf_file_name, "amounts": [{"amount": "$1.00"}]}
@@ -105,4 +106,34 @@ def test_parse_file_parses_real_bill_fixtures(pdf_name: str, expected_bill_date:
         isinstance(item, dict) and isinstance(item.get("amount"), str) and item["amount"].startswith("$")
         for item in amounts
     )
-    
\ No newline at end of file
+    
+
+@pytest.mark.parametrize("wrap", [bytes, memoryview, io.BytesIO])
+def test_parse_file_accepts_in_memory_bills(wrap):
+    from benchmarks import synthetic_bills
+
+    bill = synthetic_bills.make_bill("v2", lines=3, noise=5)
+    dated = parser.parse_file(wrap(bill.pdf), file_name="bucket/" + bill.file_name())
+    assert dated["amounts"] == bill.amounts
+    assert dated["billDate"] == bill.billDate
+    assert dated["fileName"] == "bucket/" + bill.file_name()
+
+    # Without a logical name the version comes from the content.
+    unnamed = parser.parse_file(wrap(bill.pdf))
+    assert unnamed["amounts"] == bill.amounts
+    assert unnamed["fileName"] is None
+
+
+def test_in_memory_bills_are_checked_by_content_not_name():
+    from benchmarks import synthetic_bills
+
+    bill = synthetic_bills.make_bill("v2", lines=2)
+    parsed = parser.parse_file(bill.pdf, file_name="bucket/object-1234")
+    assert parsed["amounts"] == bill.amounts
+    with pytest.raises(Exception, match="is not a PDF file"):
+        parser.parse_file(b"hello", file_name="bucket/bill.pdf")
+
+    # A strided view, e.g. every other byte of an interleaved buffer.
+    interleaved = bytearray(len(bill.pdf) * 2)
+    interleaved[::2] = bill.pdf
+    assert parser.parse_file(memoryview(interleaved)[::2])["amounts"] == bill.amounts
@@ -0,0 +1,104 @@
+from pathlib import Path
+
+import pytest
+
+from verizon_bill_parser import mypdfutils
+from verizon_bill_parser.pdfsession import ScannedLine
+from verizon_bill_parser.textbox import TextBox
+
+
+def test_version_detection_and_extraction_share_one_session(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+
+    pages = {
+        0: [TextBox("Bill date\nAccount number\nInvoice number\n", 276, 215, 342, 248)],
+        2: [
+            TextBox("Bill summary by line\n", 40, 718, 120, 727),
+            TextBox("Alex Smith\nApple iPhone 15\n", 40, 667, 106, 689),
+            TextBox("$40.00\n", 300, 678, 328, 687),
+        ],
+    }
+    sessions = []
+
+    class FakeSession:
+        def __init__(self, pdf_file_name, metrics=None, data=None):
+            self.layout_calls = []
+            self.closed = False
+            sessions.append(self)
+
+        def text_boxes(self, page_number, keep=True):
+            self.layout_calls.append(page_number)
+            return pages.get(page_number)
+
+        def scan_lines(self, page_number):
+            return None
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(mypdfutils, "PdfSession", FakeSession)
+
+    parsed = mypdfutils.MyPDFUtils(str(pdf_path)).parsedData
+    assert len(sessions) == 1
+    assert sessions[0].layout_calls == [0, 2]
+    assert sessions[0].closed
+    assert parsed["amounts"] == [
+        {"amount": "$40.00", "amountCents": 4000, "name": "Alex Smith", "description": "Apple iPhone 15"}
+    ]
+
+
+@pytest.mark.parametrize(
+    "scanned_x0, expected_layout_calls",
+    [
+        (276.0, [2]),  # content stream scan decides, page 0 is never laid out
+        (120.0, [0, 2]),  # text is elsewhere on the page, fall back to layout
+    ],
+)
+def test_version_detection_tries_content_stream_scan_first(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, scanned_x0, expected_layout_calls
+):
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+
+    scanned = [
+        ScannedLine("Bill date", scanned_x0, 239.0),
+        ScannedLine("Account number", scanned_x0, 228.0),
+        ScannedLine("Invoice number", scanned_x0, 217.0),
+    ]
+    pages = {
+        0: [TextBox("Bill date\nAccount number\nInvoice number\n", 276, 215, 342, 248)],
+        2: [TextBox("Bill summary by line\n", 40, 718, 120, 727)],
+    }
+    layout_calls = []
+
+    class FakeSession:
+        def __init__(self, pdf_file_name, metrics=None, data=None):
+            pass
+
+        def text_boxes(self, page_number, keep=True):
+            layout_calls.append(page_number)
+            return pages.get(page_number)
+
+        def scan_lines(self, page_number):
+            return scanned if page_number == 0 else None
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(mypdfutils, "PdfSession", FakeSession)
+
+    assert mypdfutils.MyPDFUtils(str(pdf_path)).pdf_file_version == "v2"
+    assert layout_calls == expected_layout_calls
+
+
+def test_buffer_reader_reads_like_a_file():
+    from verizon_bill_parser.pdfsession import BufferReader
+
+    reader = BufferReader(memoryview(b"0123456789"))
+    assert reader.read(4) == b"0123"
+    reader.seek(-3, 2)
+    assert (reader.tell(), reader.read()) == (7, b"789")
+    assert reader.read(5) == b""
+    reader.close()
+    assert reader.closed
@@ -0,0 +1,60 @@
+import dataclasses
+from datetime import datetime
+
+import pytest
+
+from verizon_bill_parser import profiles
+
+
+@pytest.mark.parametrize(
+    "date, expected",
+    [
+        (datetime(2021, 12, 31), None),
+        (datetime(2022, 1, 1), "v1"),
+        (datetime(2022, 12, 1), "v1"),
+        (datetime(2023, 5, 18), None),
+        (datetime(2023, 10, 1), "v2"),
+        (datetime(2025, 10, 18), "v2"),
+        (datetime(2026, 10, 2), None),
+    ],
+)
+def test_profile_for_date(date, expected):
+    profile = profiles.profile_for_date(date)
+    assert (profile.name if profile else None) == expected
+
+
+def test_profiles_are_immutable():
+    v2 = profiles.get_profile("v2")
+    context = v2.contexts["Bill summary by line"]
+    assert context.max_x0 == 330
+    assert "Plan changed" in context.skip
+    trie = v2.header_trie
+    assert trie.headers[trie.advance(0, "bill summary by line".split())] == "Bill summary by line"
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        v2.pages_to_parse = (0,)
+    with pytest.raises(TypeError):
+        v2.contexts["Other"] = context
+    with pytest.raises(AttributeError):
+        context.skip.add("x")
+    with pytest.raises(TypeError):
+        trie.children[0]["x"] = 1
+
+
+def test_overlapping_date_ranges_are_rejected():
+    config = {
+        name: dict(profiles.VZW_PDF_VERSIONS["v1"], dateInit=init, dateEnd=end)
+        for name, init, end in (("a", "01/01/2022", "06/01/2022"), ("b", "05/01/2022", "12/01/2022"))
+    }
+    with pytest.raises(ValueError):
+        profiles.compile_profiles(config)
+
+
+def test_header_trie_follows_words_across_calls():
+    trie = profiles.compile_header_trie(["Bill summary by line", "Bill   Summary"])
+    node = trie.advance(0, ["bill", "summary"])
+    assert trie.headers[node] == "Bill   Summary"
+    node = trie.advance(node, ["by"])
+    assert trie.headers[node] is None
+    assert trie.headers[trie.advance(node, ["line"])] == "Bill summary by line"
+    assert trie.advance(node, ["lines"]) == -1
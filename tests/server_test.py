@@ -0,0 +1,102 @@
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks import synthetic_bills
+from verizon_bill_parser.server import BillServer
+
+
+@pytest.fixture
+def bill_server():
+    server = BillServer(("127.0.0.1", 0), workers=1, timeout=30, max_upload_bytes=100_000)
+    server.warm_up()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, data):
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/pdf"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def post_headers(server, length):
+    # Only the headers are sent, so a rejected upload cannot reset the connection mid-body.
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    try:
+        connection.putrequest("POST", "/parse")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_parse_upload_and_metrics(bill_server):
+    server, url = bill_server
+    bill = synthetic_bills.make_bill("v2", lines=3, noise=5)
+
+    status, parsed = post(f"{url}/parse?fileName={bill.file_name()}", bill.pdf)
+    assert status == 200
+    assert parsed["amounts"] == bill.amounts
+    assert parsed["billDate"] == bill.billDate
+
+    status, error = post(f"{url}/parse", b"not a pdf")
+    assert status == 422
+    assert error["errorType"]
+
+    with urllib.request.urlopen(f"{url}/healthz", timeout=10) as response:
+        assert json.loads(response.read())["status"] == "ok"
+    with urllib.request.urlopen(f"{url}/metrics", timeout=10) as response:
+        metrics = response.read().decode().splitlines()
+    assert "verizon_bill_parser_bills_total 1" in metrics
+    assert "verizon_bill_parser_http_requests_total 2" in metrics
+    assert "verizon_bill_parser_http_failures_total 1" in metrics
+    assert metrics[-1] == "# EOF"
+
+
+def test_limits(bill_server):
+    server, url = bill_server
+    assert post_headers(server, "200000")[0] == 413
+
+    # Fill every queue slot; the next request is turned away.
+    for _ in range(server.max_queue):
+        assert server.admit()
+    try:
+        status, error = post(f"{url}/parse", b"%PDF-1.4\n")
+        assert status == 503
+    finally:
+        for _ in range(server.max_queue):
+            server.release()
+    assert server.counters["http_rejected"] == 1
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_invalid_content_length_is_rejected(bill_server, length):
+    server, url = bill_server
+    status, error = post_headers(server, length)
+    assert status == 400
+    assert "Invalid Content-Length" in error["error"]
+
+
+def test_server_errors_are_answered(bill_server, monkeypatch):
+    server, url = bill_server
+
+    def broken_parse(data, file_name):
+        raise RuntimeError("event loop is gone")
+
+    monkeypatch.setattr(server, "parse", broken_parse)
+    status, error = post(f"{url}/parse", b"%PDF-1.4\n")
+    assert (status, error["errorType"]) == (500, "RuntimeError")
+    assert server.in_flight == 0
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import pytest
+
+from benchmarks import synthetic_bills
+from verizon_bill_parser import parser
+
+
+@pytest.mark.parametrize(
+    "version, dated, kwargs",
+    [
+        ("v1", True, {"lines": 12, "noise": 20}),
+        ("v2", True, {"lines": 6, "noise": 20}),
+        ("v2", False, {"lines": 8, "pages": 5, "noise": 20}),
+    ],
+)
+def test_parse_file_on_synthetic_bills(tmp_path: Path, version, dated, kwargs):
+    bill = synthetic_bills.make_bill(version, seed=7, **kwargs)
+    pdf_path = tmp_path / bill.file_name(dated=dated)
+    pdf_path.write_bytes(bill.pdf)
+
+    result = parser.parse_file(str(pdf_path))
+    assert result["amounts"] == bill.amounts
+    if dated:
+        assert result["billDate"] == bill.billDate
+
+
+def test_write_bills_names_are_unique(tmp_path: Path):
+    paths = synthetic_bills.write_bills(str(tmp_path), 400, version="v1")
+    assert len(set(paths)) == 400
+    assert all(Path(p).name.startswith("MyBill_") for p in paths)
+
@@ -0,0 +1,18 @@
+from pdfminer.layout import LTRect
+
+from verizon_bill_parser.textbox import TextBox, text_boxes_from_layout
+
+
+def test_text_box_row_round_trip():
+    box = TextBox("$40.00\n", 300.5, 678.25, 328.0, 687.0)
+    assert TextBox.from_row(box.to_row()) == box
+    assert box.get_text() == "$40.00\n"
+
+
+def test_text_box_has_no_instance_dict():
+    assert not hasattr(TextBox("a", 0, 0, 0, 0), "__dict__")
+
+
+def test_text_boxes_from_layout_ignores_non_text_elements():
+    layout = [LTRect(1, (0, 0, 10, 10))]
+    assert text_boxes_from_layout(layout) == []
@@ -0,0 +1,49 @@
+import io
+import json
+import logging
+from pathlib import Path
+
+import pytest
+
+from verizon_bill_parser import mypdfutils
+from verizon_bill_parser.trace import JsonLinesTrace, TraceRecorder
+
+
+def test_trace_records_context_transitions_and_decisions(tmp_path: Path, fake_pdf_session):
+    fake_pdf_session()
+    pdf_path = tmp_path / "upload.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+
+    recorder = TraceRecorder()
+    parsed = mypdfutils.MyPDFUtils(str(pdf_path), trace=recorder).parsedData
+
+    assert parsed["amounts"][0]["amount"] == "$40.00"
+    assert recorder.select("context_open") == [
+        {"event": "context_open", "page": 2, "context": "Bill summary by line", "via": "exact"}
+    ]
+    skips = [(e["reason"], e["text"]) for e in recorder.select("skip")]
+    assert ("x0_limit", "Questions about your bill?\n") in skips
+    assert ("v2_total_label", "Total:") in skips
+    assert ("v2_total_amount", "$40.00") in skips
+    assert [e["row"] for e in recorder.select("amount")] == [0]
+
+
+def test_json_lines_trace_writes_one_object_per_event():
+    stream = io.StringIO()
+    sink = JsonLinesTrace(stream)
+    sink({"event": "skip", "reason": "skip_list"})
+    sink({"event": "context_close"})
+    assert [json.loads(line)["event"] for line in stream.getvalue().splitlines()] == ["skip", "context_close"]
+
+
+def test_no_debug_messages_are_built_when_debug_is_off(tmp_path: Path, fake_pdf_session, monkeypatch: pytest.MonkeyPatch):
+    fake_pdf_session()
+    pdf_path = tmp_path / "MyBill_11.15.2024.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("debug message built with logging at ERROR")
+
+    monkeypatch.setattr(mypdfutils.MyPDFUtils, "_note", fail)
+    parsed = mypdfutils.MyPDFUtils(str(pdf_path), log_level=logging.ERROR).parsedData
+    assert parsed["amounts"][0]["phoneNum"] == "555-123-4560"
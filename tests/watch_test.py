@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from benchmarks import synthetic_bills
+from verizon_bill_parser import batch, watch
+from verizon_bill_parser.cache import hash_file
+
+
+def crashing_parse_one(file_path, log_level, cache=None):
+    if file_path.endswith("crash.pdf"):
+        os._exit(1)
+    return batch.BillResult(fileName=file_path, parsedData={"fileName": file_path, "amounts": []})
+
+
+def test_watcher_waits_for_bills_to_settle_and_resumes_from_checkpoint(tmp_path: Path):
+    bills = tmp_path / "bills"
+    bills.mkdir()
+    checkpoint = str(tmp_path / "checkpoint.sqlite")
+    partial = synthetic_bills.make_bill("v2", lines=2, seed=7).pdf
+    (bills / "upload.pdf").write_bytes(partial[:100])
+
+    delivered = []
+    with watch.BillWatcher(str(bills), delivered.append, checkpoint, workers=1,
+                           settle_seconds=60) as watcher:
+        # Still being written: nothing is parsed.
+        assert watcher.poll() == 0
+        (bills / "upload.pdf").write_bytes(partial)
+        assert watcher.poll() == 0
+        watcher.settle_seconds = 0
+        assert watcher.poll() == 1
+        assert watcher.deliver() == 1
+        # Unchanged on the next scan.
+        assert watcher.poll() == 0
+    assert [result.fileName for result in delivered] == [str(bills / "upload.pdf")]
+    assert delivered[0].ok
+
+    # A restarted watcher only delivers the bill that is new since the checkpoint.
+    paths = synthetic_bills.write_bills(str(bills), 1, version="v2", lines=2)
+    out = tmp_path / "bills.ndjson"
+    sink = watch.JsonlSink(str(out))
+    with watch.BillWatcher(str(bills), sink, checkpoint, workers=1, settle_seconds=0) as watcher:
+        watcher.run(max_polls=2)
+    sink.close()
+    assert [json.loads(line)["fileName"] for line in out.read_text().splitlines()] == paths
+
+
+def test_full_queue_leaves_bills_for_a_later_poll(tmp_path: Path):
+    paths = synthetic_bills.write_bills(str(tmp_path / "bills"), 3, version="v2", lines=2)
+    delivered = []
+    with watch.BillWatcher(str(tmp_path / "bills"), delivered.append, str(tmp_path / "checkpoint.sqlite"),
+                           workers=1, queue_size=2, settle_seconds=0) as watcher:
+        assert watcher.poll() == 2
+        assert watcher.poll() == 0
+        assert watcher.deliver() == 2
+        assert watcher.poll() == 1
+        assert watcher.deliver() == 1
+    assert sorted(result.fileName for result in delivered) == paths
+
+
+def test_bill_is_not_checkpointed_when_the_sink_fails(tmp_path: Path):
+    synthetic_bills.write_bills(str(tmp_path / "bills"), 1, version="v2", lines=2)
+    checkpoint = str(tmp_path / "checkpoint.sqlite")
+
+    def failing_sink(result):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        with watch.BillWatcher(str(tmp_path / "bills"), failing_sink, checkpoint,
+                               workers=1, settle_seconds=0) as watcher:
+            watcher.run(max_polls=1)
+
+    delivered = []
+    with watch.BillWatcher(str(tmp_path / "bills"), delivered.append, checkpoint,
+                           workers=1, settle_seconds=0) as watcher:
+        watcher.run(max_polls=1)
+    assert len(delivered) == 1
+
+
+def test_stop_ends_run_from_another_thread(tmp_path: Path):
+    (tmp_path / "bills").mkdir()
+    with watch.BillWatcher(str(tmp_path / "bills"), print, str(tmp_path / "checkpoint.sqlite"),
+                           workers=1, poll_interval=0.05) as watcher:
+        timer = threading.Timer(0.2, watcher.stop)
+        timer.start()
+        watcher.run()
+        timer.join()
+
+
+def test_failed_bills_are_not_checkpointed(tmp_path: Path):
+    (tmp_path / "bills").mkdir()
+    (tmp_path / "bills" / "truncated.pdf").write_bytes(b"%PDF-1.4\n")
+    checkpoint = str(tmp_path / "checkpoint.sqlite")
+
+    for run in range(2):
+        delivered = []
+        with watch.BillWatcher(str(tmp_path / "bills"), delivered.append, checkpoint,
+                               workers=1, settle_seconds=0) as watcher:
+            watcher.run(max_polls=1)
+            # Not parsed again while the file stays the same.
+            assert watcher.poll() == 0
+        assert [result.ok for result in delivered] == [False]
+
+
+def test_changed_bill_waits_for_its_queued_version(tmp_path: Path):
+    bills = tmp_path / "bills"
+    paths = synthetic_bills.write_bills(str(bills), 1, version="v2", lines=2)
+    delivered = []
+    with watch.BillWatcher(str(bills), delivered.append, str(tmp_path / "checkpoint.sqlite"),
+                           workers=1, settle_seconds=0) as watcher:
+        assert watcher.poll() == 1
+        Path(paths[0]).write_bytes(synthetic_bills.make_bill("v2", lines=3, seed=5).pdf)
+        assert watcher.poll() == 0
+        assert watcher.deliver() == 1
+        assert watcher.poll() == 1
+        assert watcher.deliver() == 1
+    assert [len(result.parsedData["amounts"]) for result in delivered] == [2, 3]
+
+
+def test_worker_crash_replaces_the_pool_and_retries(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(watch, "_parse_one", crashing_parse_one)
+    bills = tmp_path / "bills"
+    bills.mkdir()
+    for name in ("a.pdf", "crash.pdf", "b.pdf"):
+        (bills / name).write_bytes(b"%PDF-1.4\n")
+
+    delivered = []
+    with watch.BillWatcher(str(bills), delivered.append, str(tmp_path / "checkpoint.sqlite"),
+                           workers=2, settle_seconds=0, poll_interval=0.01) as watcher:
+        watcher.run(max_polls=10)
+    results = {Path(result.fileName).name: result for result in delivered}
+    assert sorted(results) == ["a.pdf", "b.pdf", "crash.pdf"]
+    assert results["a.pdf"].ok and results["b.pdf"].ok
+    assert results["crash.pdf"].errorType == "BrokenProcessPool"
+
+
+@pytest.mark.parametrize("after_crash", ["checkpointed_elsewhere", "emptied"])
+def test_a_suspect_that_is_not_parsed_again_holds_no_bill_back(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                                               after_crash):
+    monkeypatch.setattr(watch, "_parse_one", crashing_parse_one)
+    bills = tmp_path / "bills"
+    bills.mkdir()
+    for name in ("a.pdf", "crash.pdf"):
+        (bills / name).write_bytes(b"%PDF-1.4\n")
+    crash = str(bills / "crash.pdf")
+
+    delivered = []
+    with watch.BillWatcher(str(bills), delivered.append, str(tmp_path / "checkpoint.sqlite"),
+                           workers=2, settle_seconds=0, poll_interval=0.01) as watcher:
+        assert watcher.poll() == 2
+        while watcher._queued:
+            watcher.deliver(timeout=None)
+        assert crash in watcher._suspects
+        if after_crash == "checkpointed_elsewhere":
+            watcher.manifest.record(crash, os.stat(crash), hash_file(crash),
+                                    batch.BillResult(fileName=crash, parsedData={"fileName": crash, "amounts": []}))
+        else:
+            # Never settles while it stays empty.
+            (bills / "crash.pdf").write_bytes(b"")
+        (bills / "new.pdf").write_bytes(b"%PDF-1.4\n")
+        watcher.run(max_polls=10)
+        assert watcher._isolated is None
+    assert str(bills / "new.pdf") in [result.fileName for result in delivered if result.ok]
+    assert crash not in [result.fileName for result in delivered]
@@ -0,0 +1,260 @@
+#asyncio front end for the bill parser
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterable, AsyncIterator, Iterable, Optional, Union
+
+from . import batch
+from .batch import BillResult, default_workers
+from .cache import ParseCache
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up() -> int:
+    # Unpickling this task imports the parser, pdfminer and the profiles in the worker.
+    return os.getpid()
+
+
+def _init_worker(max_memory_mb: Optional[int], pids):
+    '''
+    Pool initializer: report the worker's pid so a stuck pool can be
+    terminated, and cap its address space, so a pathological PDF fails with
+    MemoryError (or kills its worker) instead of exhausting the host.
+    '''
+    pids.put(os.getpid())
+    if max_memory_mb is None:
+        return
+    import resource
+    limit = max_memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class AsyncBillParser:
+    '''
+    Parses bills for asyncio code without blocking the event loop. Bills run
+    in a process pool owned by the parser (or in the executor given), at
+    most `concurrency` at a time, each with an optional timeout in seconds.
+
+    A bill that times out or kills its worker has its worker processes
+    terminated and the pool replaced, so it cannot keep a worker busy; other
+    bills that were running in that pool are resubmitted once. Use as an
+    async context manager, or call close().
+
+    With a timeout, concurrency is capped at the number of workers of the
+    parser's own pool, so a bill never spends its timeout queued for a
+    worker.
+    '''
+
+    def __init__(self, workers: Optional[int] = None, concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None, max_memory_mb: Optional[int] = None,
+                 cache: Optional[ParseCache] = None, log_level=logging.ERROR,
+                 executor: Optional[Executor] = None, collect_metrics: bool = False):
+        self.workers = workers if workers is not None else default_workers()
+        # One bill per worker by default, so timeouts measure parse time, not queueing.
+        self.concurrency = concurrency if concurrency is not None else self.workers
+        if timeout is not None and executor is None:
+            self.concurrency = min(self.concurrency, self.workers)
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+        self.cache = cache
+        self.log_level = log_level
+        # Results then carry the bill's ParseMetrics.to_dict() in BillResult.metrics.
+        self.collect_metrics = collect_metrics
+        self._executor = executor
+        # Pools created here can be torn down on timeouts; a given executor cannot.
+        self._owns_executor = executor is None
+        self._generation = 0
+        # Pids reported by the current pool's workers, see _init_worker.
+        self._worker_pids = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        # Workers still busy with cancelled bills are stopped too.
+        self._recycle(self._generation)
+
+    async def warm_up(self) -> set:
+        '''
+        Start the pool's workers and load the parser in them before the
+        first bill arrives. Returns the worker pids that answered.
+        '''
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        pids = await asyncio.gather(*(loop.run_in_executor(executor, _warm_up) for _ in range(self.workers)))
+        return set(pids)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._worker_pids = multiprocessing.SimpleQueue()
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.max_memory_mb, self._worker_pids))
+        return self._executor
+
+    def _recycle(self, generation: int):
+        '''
+        Terminate the pool's workers and start a new pool on next use. Only
+        the first caller for a given pool does anything.
+        '''
+        if not self._owns_executor or generation != self._generation or self._executor is None:
+            return
+        self._generation += 1
+        executor, self._executor = self._executor, None
+        worker_pids, self._worker_pids = self._worker_pids, None
+        # ProcessPoolExecutor cannot stop a running task; its workers are killed instead.
+        # Bills still queued are cancelled, running ones fail with BrokenProcessPool.
+        executor.shutdown(wait=False, cancel_futures=True)
+        while not worker_pids.empty():
+            try:
+                os.kill(worker_pids.get(), signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        worker_pids.close()
+
+    @staticmethod
+    def _work_item(source, file_name: Optional[str]) -> tuple:
+        '''
+        (file name, data) for the worker: paths are opened by the worker,
+        in-memory bills are sent as bytes.
+        '''
+        if isinstance(source, (str, os.PathLike)):
+            return os.fspath(source), None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return file_name, bytes(source)
+        if hasattr(source, "read"):
+            return file_name, source.read()
+        raise TypeError(f"Cannot parse a bill from {type(source).__name__}")
+
+    async def parse_result(self, source, file_name: Optional[str] = None) -> BillResult:
+        '''
+        Parse one bill (a path, bytes, memoryview or binary stream) and
+        return its BillResult. Failures and timeouts are reported in the
+        result, not raised. Cancelling the caller cancels a bill that has not
+        started; one already in a worker runs to the end and keeps its
+        concurrency slot until then, so later bills do not queue behind it.
+        '''
+        file_name, data = self._work_item(source, file_name)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        await self._semaphore.acquire()
+        release = True
+        try:
+            for attempt in range(2):
+                generation = self._generation
+                work = self._get_executor().submit(batch._parse_one, file_name, self.log_level, self.cache,
+                                                   self.collect_metrics, False, data)
+                try:
+                    return await asyncio.wait_for(asyncio.wrap_future(work), self.timeout)
+                except asyncio.CancelledError:
+                    if not work.cancel() and not work.done():
+                        release = False
+                        work.add_done_callback(lambda _: self._release_from_thread(loop))
+                    raise
+                except asyncio.TimeoutError:
+                    logger.warning(f"Parsing {file_name} timed out after {self.timeout}s")
+                    self._recycle(generation)
+                    return BillResult(fileName=file_name, error=f"Timed out after {self.timeout}s",
+                                      errorType="TimeoutError")
+                except BrokenProcessPool as e:
+                    if generation != self._generation and attempt == 0:
+                        # The pool was torn down for another bill; this one never finished.
+                        continue
+                    self._recycle(generation)
+                    return BillResult(fileName=file_name, error=str(e) or "Worker process died",
+                                      errorType=type(e).__name__)
+        finally:
+            if release:
+                self._semaphore.release()
+
+    def _release_from_thread(self, loop: asyncio.AbstractEventLoop):
+        # Done callback of a cancelled bill's future, run in the pool's thread.
+        try:
+            loop.call_soon_threadsafe(self._semaphore.release)
+        except RuntimeError:
+            # The event loop is gone, and the semaphore with it.
+            pass
+
+    async def parse_file(self, source, file_name: Optional[str] = None) -> dict:
+        '''
+        Parse one bill and return its parsed data, like parser.parse_file.
+        Raises TimeoutError on timeout and Exception for failed bills.
+        '''
+        result = await self.parse_result(source, file_name)
+        if result.errorType == "TimeoutError":
+            raise TimeoutError(f"Parsing {result.fileName}: {result.error}")
+        if not result.ok:
+            raise Exception(result.error)
+        return result.parsedData
+
+    async def parse_many(self, sources: Union[Iterable, AsyncIterable]) -> AsyncIterator[BillResult]:
+        '''
+        Parse bills and yield their BillResults as they finish. sources may
+        be a plain or async iterable of paths, bytes, or (data, file_name)
+        pairs; it is read only as fast as bills complete. Leaving the loop
+        early cancels the bills still pending (see parse_result).
+        '''
+        pending = set()
+        try:
+            async for source in _aiter(sources):
+                if isinstance(source, tuple):
+                    pending.add(asyncio.ensure_future(self.parse_result(*source)))
+                else:
+                    pending.add(asyncio.ensure_future(self.parse_result(source)))
+                if len(pending) >= self.concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _aiter(items: Union[Iterable, AsyncIterable]):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def aparse_file(source, file_name: Optional[str] = None, timeout: Optional[float] = None,
+                      cache: Optional[ParseCache] = None, max_memory_mb: Optional[int] = None) -> dict:
+    '''
+    Parse one bill in a worker process without blocking the event loop.
+    Starts a one-off worker; services parsing many bills should share an
+    AsyncBillParser instead.
+    '''
+    async with AsyncBillParser(workers=1, timeout=timeout, max_memory_mb=max_memory_mb,
+                               cache=cache) as bill_parser:
+        return await bill_parser.parse_file(source, file_name)
+
+
+async def aparse_many(sources: Union[Iterable, AsyncIterable], workers: Optional[int] = None,
+                      concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                      cache: Optional[ParseCache] = None,
+                      max_memory_mb: Optional[int] = None) -> AsyncIterator[BillResult]:
+    '''
+    Parse bills over a process pool and yield BillResults as they finish.
+    See AsyncBillParser.parse_many.
+    '''
+    async with AsyncBillParser(workers=workers, concurrency=concurrency, timeout=timeout,
+                               max_memory_mb=max_memory_mb, cache=cache) as bill_parser:
+        async for result in bill_parser.parse_many(sources):
+            yield result
@@ -0,0 +1,25 @@
+#Amount parsing
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+_AMOUNT = re.compile(r"^(?P<open>\()?\s*(?P<sign>-)?\s*\$?\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<trail>-|CR)?\s*(?P<close>\))?$")
+
+
+def amount_to_cents(text: Optional[str]) -> Optional[int]:
+    '''
+    Convert a bill amount such as "$45.00", "-$5.00", "($5.00)" or
+    "$1,234.50" to integer cents. Returns None for anything else.
+    '''
+    if text is None:
+        return None
+    match = _AMOUNT.match(text.strip())
+    if match is None or bool(match.group("open")) != bool(match.group("close")):
+        return None
+    try:
+        cents = int((Decimal(match.group("number").replace(",", "")) * 100).to_integral_value())
+    except InvalidOperation:
+        return None
+    if match.group("open") or match.group("sign") or match.group("trail"):
+        cents = -cents
+    return cents
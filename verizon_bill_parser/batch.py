@@ -0,0 +1,187 @@
+#Batch parsing of many bills over a process pool
+import builtins
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional, Sized
+
+from .mypdfutils import MyPDFUtils
+from .cache import ParseCache
+from .metrics import ParseMetrics
+
+logger = logging.getLogger(__name__)
+
+# Number of bills kept in flight per worker, so huge inputs do not queue
+# every future up front.
+IN_FLIGHT_PER_WORKER = 4
+
+
+@dataclass
+class BillResult:
+    fileName: str
+    parsedData: Optional[dict] = None
+    error: Optional[str] = None
+    errorType: Optional[str] = None
+    # ParseMetrics.to_dict() of this bill, when metrics were collected.
+    metrics: Optional[dict] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def raise_error(self):
+        '''
+        Raise the bill's error. Only the exception's type name survives the
+        trip from a worker process, so built-in types are raised again as
+        themselves and anything else as Exception.
+        '''
+        error_type = getattr(builtins, self.errorType or "", None)
+        if isinstance(error_type, type) and issubclass(error_type, Exception):
+            try:
+                raise error_type(self.error)
+            except TypeError:
+                # Types such as UnicodeDecodeError need more than a message.
+                pass
+        raise Exception(self.error)
+
+
+@dataclass
+class BatchReport:
+    results: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def _parse_one(file_path: str, log_level, cache: Optional[ParseCache] = None,
+               collect_metrics: bool = False, attach_metrics: bool = False,
+               data: Optional[bytes] = None) -> BillResult:
+    '''
+    Worker entry point, runs in the pool processes. Errors are captured
+    as text so one bad bill never takes the batch down. With data,
+    file_path is the bill's logical name.
+    '''
+    try:
+        billMetrics = ParseMetrics() if collect_metrics or attach_metrics else None
+        pdfUtils = MyPDFUtils(pdf_file_name=file_path, log_level=log_level, cache=cache,
+                              metrics=billMetrics, data=data)
+        result = BillResult(fileName=file_path, parsedData=pdfUtils.parsedData)
+        if billMetrics is not None:
+            result.metrics = billMetrics.to_dict()
+            if attach_metrics:
+                result.parsedData["metrics"] = result.metrics
+        return result
+    except Exception as e:
+        return BillResult(fileName=file_path, error=str(e), errorType=type(e).__name__)
+
+
+def iter_parse_files(file_paths: Iterable[str], workers: Optional[int] = None,
+                     log_level=logging.ERROR,
+                     cache: Optional[ParseCache] = None, collect_metrics: bool = False,
+                     attach_metrics: bool = False) -> Iterator[BillResult]:
+    '''
+    Parse bills and yield a BillResult for each one as soon as it finishes.
+    Results come back in completion order; use parse_batch for sorted output.
+    With workers=1 (or a single file) everything runs in the calling process.
+    file_paths may be a lazy iterable (e.g. paths read from a pipe); it is
+    consumed only as fast as workers free up.
+    A ParseCache may be shared by all workers. With collect_metrics each
+    result carries its bill's metrics; attach_metrics also puts them in
+    parsedData["metrics"].
+
+    A worker that dies (out of memory, a crash in a native library) breaks
+    the whole pool. The pool is then replaced and the bills that were in
+    it are retried one at a time, so only the bill that kills a worker on
+    its own is reported as failed, with errorType "BrokenProcessPool".
+    '''
+    if workers is None:
+        workers = default_workers()
+    if isinstance(file_paths, Sized):
+        workers = min(workers, len(file_paths))
+    workers = max(1, workers)
+
+    if workers == 1:
+        for file_path in file_paths:
+            yield _parse_one(file_path, log_level, cache, collect_metrics, attach_metrics)
+        return
+
+    logger.debug(f"Parsing files with {workers} workers")
+    pending_paths = iter(file_paths)
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+    # Bills that were in the pool when a worker died, retried one at a time.
+    suspects = deque()
+    # future -> (file path, whether it ran alone)
+    in_flight = {}
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            if suspects:
+                if not in_flight:
+                    file_path = suspects.popleft()
+                    in_flight[executor.submit(_parse_one, file_path, log_level, cache,
+                                              collect_metrics, attach_metrics)] = (file_path, True)
+            else:
+                while len(in_flight) < max_in_flight:
+                    file_path = next(pending_paths, None)
+                    if file_path is None:
+                        break
+                    in_flight[executor.submit(_parse_one, file_path, log_level, cache,
+                                              collect_metrics, attach_metrics)] = (file_path, False)
+            if not in_flight:
+                return
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                # Every bill still in the broken pool fails with it.
+                done, _ = wait(in_flight)
+                logger.warning(f"A worker process died, retrying {len(done)} bills")
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=workers)
+            for future in done:
+                file_path, alone = in_flight.pop(future)
+                error = future.exception()
+                if not isinstance(error, BrokenProcessPool):
+                    yield future.result()
+                elif alone:
+                    yield BillResult(fileName=file_path, error=str(error) or "Worker process died",
+                                     errorType=type(error).__name__)
+                else:
+                    suspects.append(file_path)
+    finally:
+        # Bills not started yet are dropped when the caller stops early.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def parse_batch(file_paths: Iterable[str], workers: Optional[int] = None,
+                log_level=logging.ERROR, cache: Optional[ParseCache] = None,
+                metrics: Optional[ParseMetrics] = None, attach_metrics: bool = False,
+                fail_fast: bool = False) -> BatchReport:
+    '''
+    Parse bills in parallel and collect the outcome. Successful results and
+    per-file errors are both sorted by file name so output is deterministic
+    regardless of completion order. Per-bill metrics from the workers are
+    summed into metrics. With fail_fast, parsing stops at the first failed
+    bill, which is then the only error in the report.
+    '''
+    report = BatchReport()
+    results = iter_parse_files(file_paths, workers=workers, log_level=log_level, cache=cache,
+                               collect_metrics=metrics is not None, attach_metrics=attach_metrics)
+    for result in results:
+        if metrics is not None and result.metrics is not None:
+            metrics.merge(result.metrics)
+        if result.ok:
+            report.results.append(result)
+        else:
+            logger.warning(f"Failed to parse {result.fileName}: {result.error}")
+            report.errors.append(result)
+            if fail_fast:
+                results.close()
+                break
+    report.results.sort(key=lambda r: r.fileName)
+    report.errors.sort(key=lambda r: r.fileName)
+    return report
@@ -0,0 +1,155 @@
+#Class ParseCache
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 256 MB unless told otherwise.
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# When the cache grows past max_bytes it is trimmed down to this fraction,
+# so eviction scans are not triggered again by the very next write.
+EVICT_TO_RATIO = 0.9
+
+TEXT_BOXES = "textboxes"
+PARSED_DATA = "parsed"
+PAGE_INDEX = "pageindex"
+
+# Part of every parsed-data key; bump when the shape of parsedData changes
+# so entries written by older code are not served.
+PARSED_DATA_FORMAT = 2
+# Same for the text-box entries (2: pages carry their "pageNumbers",
+# 3: entries say whether their version was detected from the content).
+TEXT_BOXES_FORMAT = 3
+
+
+def hash_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_bytes(data) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(*parts) -> str:
+    return hashlib.sha256("\0".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    '''
+    On-disk, content-addressed cache for parsed bills.
+
+    Two kinds of entries are kept: the compact text-box stream produced by
+    layout analysis (what parse_data_elements consumes) and the final
+    parsedData. Entries are JSON files written atomically with os.replace,
+    so several worker processes can share one cache directory without
+    locking; the least recently used entries (by mtime, refreshed on every
+    hit) are evicted once the directory grows past max_bytes.
+    '''
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Per-process estimate of the cache size; None until the first write.
+        self._size_estimate: Optional[int] = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        # Each worker process keeps its own size estimate.
+        state = self.__dict__.copy()
+        state["_size_estimate"] = None
+        return state
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_dir, kind, key[:2], key + ".json")
+
+    def get(self, kind: str, key: str):
+        path = self._path(kind, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        logger.debug(f"Cache hit {kind}/{key}")
+        return value
+
+    def put(self, kind: str, key: str, value):
+        path = self._path(kind, key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, separators=(",", ":"))
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        if self._size_estimate is None:
+            self._size_estimate = self.size()
+        else:
+            self._size_estimate += size
+        if self._size_estimate > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * EVICT_TO_RATIO)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another process evicted it first.
+                pass
+            total -= size
+        logger.debug(f"Cache evicted down to {total} bytes")
+        self._size_estimate = total
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._size_estimate = 0
+
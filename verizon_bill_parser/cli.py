@@ -0,0 +1,124 @@
+#verizon-bill-parser command line tool
+'''
+Parse Verizon bill PDFs and print one JSON object per bill, as soon as
+each bill is parsed (completion order, not input order).
+
+    verizon-bill-parser bills/ MyBill_11.18.2024.pdf
+    find /archive -name '*.pdf' | verizon-bill-parser --workers 8 > bills.ndjson
+
+Failed bills are printed as {"fileName", "error", "errorType"} and make the
+exit status 1.
+
+With --watch the command keeps running and parses each bill dropped into
+the folder once it is fully written, appending to --output. Delivered bills
+are checkpointed, so a restart resumes without parsing them again.
+
+    verizon-bill-parser --watch downloads/ -o bills.ndjson
+'''
+# Only the standard library is imported up front; pdfminer and the version
+# profiles load once there is something to parse, so --help stays instant.
+import argparse
+import json
+import logging
+import os
+import sys
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    from . import __version__
+
+    arg_parser = argparse.ArgumentParser(prog="verizon-bill-parser", description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("paths", nargs="*",
+                            help="bill PDFs or directories of them; '-' or none reads paths from stdin")
+    arg_parser.add_argument("-w", "--workers", type=int, default=None,
+                            help="worker processes (default: one per CPU)")
+    arg_parser.add_argument("-r", "--recursive", action="store_true", help="descend into subdirectories")
+    arg_parser.add_argument("--cache-dir", help="reuse parse results from this cache directory")
+    arg_parser.add_argument("-o", "--output", help="write NDJSON here instead of stdout")
+    arg_parser.add_argument("--watch", action="store_true",
+                            help="keep watching the single directory given for new bills")
+    arg_parser.add_argument("--checkpoint",
+                            help="SQLite checkpoint for --watch (default: DIR/.verizon-bill-parser.sqlite)")
+    arg_parser.add_argument("--poll-interval", type=float, default=2.0,
+                            help="seconds between folder scans with --watch (default: 2)")
+    arg_parser.add_argument("--log-level", default="ERROR", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    arg_parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    return arg_parser
+
+
+def iter_input_paths(paths: list, recursive: bool, stdin=None):
+    '''
+    Expand the command line paths: directories to the PDFs in them, '-' (or
+    no paths at all) to one path per line of stdin.
+    '''
+    from .parser import walk_pdfs
+
+    for path in paths or ["-"]:
+        if path == "-":
+            for line in (stdin or sys.stdin):
+                line = line.strip()
+                if line:
+                    yield line
+        elif os.path.isdir(path):
+            for file_path, stat in walk_pdfs(path, recursive):
+                yield file_path
+        else:
+            yield path
+
+
+def main(argv=None, stdin=None) -> int:
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(levelname)s %(name)s: %(message)s")
+    if args.watch:
+        if len(args.paths) != 1 or not os.path.isdir(args.paths[0]):
+            arg_parser.error("--watch takes exactly one directory")
+        return watch(args)
+
+    from .batch import iter_parse_files
+    from .cache import ParseCache
+
+    cache = ParseCache(args.cache_dir) if args.cache_dir else None
+    # Paths are handed to the workers as they are read, so a pipe streams.
+    file_paths = iter_input_paths(args.paths, args.recursive, stdin)
+    out = open(args.output, "w") if args.output else sys.stdout
+    failed = 0
+    results = iter_parse_files(file_paths, workers=args.workers,
+                               log_level=logging.getLevelName(args.log_level), cache=cache)
+    try:
+        for result in results:
+            if result.ok:
+                record = result.parsedData
+            else:
+                failed += 1
+                record = {"fileName": result.fileName, "error": result.error, "errorType": result.errorType}
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head). Point stdout at devnull
+        # so the flush at exit does not fail again, and exit like Python does on EPIPE.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        results.close()
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+def watch(args) -> int:
+    from .cache import ParseCache
+    from .watch import watch_directory
+
+    directory = args.paths[0]
+    checkpoint = args.checkpoint or os.path.join(directory, ".verizon-bill-parser.sqlite")
+    watch_directory(directory, args.output or sys.stdout, checkpoint, workers=args.workers,
+                    poll_interval=args.poll_interval, recursive=args.recursive,
+                    cache=ParseCache(args.cache_dir) if args.cache_dir else None,
+                    log_level=logging.getLevelName(args.log_level))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#Class Ledger
+import csv
+from array import array
+from datetime import datetime
+from typing import Iterable, Optional
+
+from .amounts import amount_to_cents
+from .profiles import DATE_FORMAT
+
+_numpy = None
+
+
+def _load_numpy():
+    # numpy is optional; without it group_by runs as a plain Python loop.
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+class _StringColumn:
+    '''
+    Dictionary encoded strings: an int code per row into a list of the
+    distinct values (None included), in first-seen order.
+    '''
+    __slots__ = ("codes", "values", "_index")
+
+    def __init__(self):
+        self.codes = array("q")
+        self.values: list = []
+        self._index: dict = {}
+
+    def append(self, value: Optional[str]):
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._index[value] = code
+        self.codes.append(code)
+
+    def to_list(self) -> list:
+        values = self.values
+        return [values[code] for code in self.codes]
+
+
+def _date_key(bill_date: Optional[str]) -> int:
+    # "MM/DD/YYYY" -> YYYYMMDD; 0 when the bill date is unknown.
+    if not bill_date:
+        return 0
+    date = datetime.strptime(bill_date, DATE_FORMAT)
+    return date.year * 10000 + date.month * 100 + date.day
+
+
+class Ledger:
+    '''
+    Line charges of many bills in columns: bill, bill date, phone number,
+    name, description and amount in cents. Numbers live in arrays and
+    strings are dictionary encoded, so years of bills stay compact and
+    group_by totals run over integer codes.
+
+    Rows without an amount are left out.
+    '''
+
+    GROUP_KEYS = ("bill", "month", "line", "name")
+
+    def __init__(self):
+        self.files: list = []
+        self.bill = array("q")
+        self.bill_date = array("q")
+        self.phone_num = _StringColumn()
+        self.name = _StringColumn()
+        self.description = _StringColumn()
+        self.cents = array("q")
+
+    @classmethod
+    def from_bills(cls, bills: Iterable[dict]) -> "Ledger":
+        ledger = cls()
+        ledger.extend(bills)
+        return ledger
+
+    def __len__(self) -> int:
+        return len(self.cents)
+
+    def append(self, parsedData: dict) -> int:
+        '''
+        Add one bill's parsed data and return the number of rows added.
+        '''
+        bill_id = len(self.files)
+        self.files.append(parsedData.get("fileName"))
+        bill_date = _date_key(parsedData.get("billDate"))
+        added = 0
+        for row in parsedData["amounts"]:
+            cents = row.get("amountCents")
+            if cents is None:
+                # Parsed data from before amountCents existed.
+                cents = amount_to_cents(row.get("amount"))
+            if cents is None:
+                continue
+            self.bill.append(bill_id)
+            self.bill_date.append(bill_date)
+            self.phone_num.append(row.get("phoneNum"))
+            self.name.append(row.get("name"))
+            self.description.append(row.get("description"))
+            self.cents.append(cents)
+            added += 1
+        return added
+
+    def extend(self, bills: Iterable[dict]):
+        for parsedData in bills:
+            self.append(parsedData)
+
+    def total_cents(self) -> int:
+        return sum(self.cents)
+
+    def _key_column(self, key: str):
+        '''
+        Integer codes of a group key per row, and how to turn a code back
+        into the key's value.
+        '''
+        if key == "bill":
+            return self.bill, self.files.__getitem__
+        if key == "month":
+            return array("q", (date // 100 for date in self.bill_date)), \
+                lambda month: f"{month // 100:04d}-{month % 100:02d}" if month else None
+        if key == "line":
+            return self.phone_num.codes, self.phone_num.values.__getitem__
+        if key == "name":
+            return self.name.codes, self.name.values.__getitem__
+        raise ValueError(f"Invalid group key: {key}, expected one of {self.GROUP_KEYS}")
+
+    def group_by(self, *keys: str) -> dict:
+        '''
+        Total cents per value of the keys ("bill" = file name, "month" =
+        "YYYY-MM" of the bill date, "line" = phone number, "name"). With
+        several keys the result is keyed by tuples. Groups are ordered by
+        first appearance, months chronologically.
+        '''
+        if not keys:
+            raise ValueError("group_by needs at least one key")
+        columns = [self._key_column(key) for key in keys]
+        numpy = _load_numpy()
+        if numpy is not None and len(self):
+            codes = numpy.stack([numpy.asarray(c, dtype=numpy.int64) for c, _ in columns], axis=1)
+            groups, inverse = numpy.unique(codes, axis=0, return_inverse=True)
+            sums = numpy.zeros(len(groups), dtype=numpy.int64)
+            numpy.add.at(sums, inverse.reshape(-1), numpy.asarray(self.cents, dtype=numpy.int64))
+            totals = {tuple(int(code) for code in group): int(total) for group, total in zip(groups, sums)}
+        else:
+            totals = {}
+            for row in zip(*(c for c, _ in columns), self.cents):
+                group = row[:-1]
+                totals[group] = totals.get(group, 0) + row[-1]
+
+        result = {}
+        for group in sorted(totals):
+            value = tuple(decode(code) for code, (_, decode) in zip(group, columns))
+            result[value if len(keys) > 1 else value[0]] = totals[group]
+        return result
+
+    def columns(self) -> dict:
+        '''
+        The ledger as plain columns (lists of str, None and int), a layout
+        pyarrow.table() or pandas.DataFrame() take as is.
+        '''
+        files = self.files
+        return {
+            "fileName": [files[bill] for bill in self.bill],
+            "billDate": [f"{d // 10000:04d}-{d // 100 % 100:02d}-{d % 100:02d}" if d else None
+                         for d in self.bill_date],
+            "phoneNum": self.phone_num.to_list(),
+            "name": self.name.to_list(),
+            "description": self.description.to_list(),
+            "amountCents": self.cents.tolist(),
+        }
+
+    def to_csv(self, f):
+        '''
+        Write the columns as CSV to a path or a text stream.
+        '''
+        if isinstance(f, str):
+            with open(f, "w", newline="") as stream:
+                return self.to_csv(stream)
+        columns = self.columns()
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(zip(*columns.values()))
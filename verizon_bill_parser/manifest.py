@@ -0,0 +1,116 @@
+#Class BillManifest
+import json
+import logging
+import os
+import sqlite3
+from typing import Iterable, Optional
+
+from . import __version__
+from .batch import BillResult
+from .cache import PARSED_DATA_FORMAT, hash_file
+from .profiles import CONFIG_FINGERPRINT
+
+logger = logging.getLogger(__name__)
+
+# Results from another parser version or parsedData format are not reused.
+_PARSER_VERSION = f"{__version__}+{PARSED_DATA_FORMAT}"
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS bills (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    config_fingerprint TEXT NOT NULL,
+    parsed_data TEXT,
+    error TEXT,
+    error_type TEXT
+)
+'''
+
+
+class BillManifest:
+    '''
+    SQLite record of the bills already parsed from a folder, keyed by path
+    and checked against size, mtime and content hash. Entries written by
+    another parser version or profile config are treated as unknown.
+    Failed bills are recorded too, so an unchanged broken file is reported
+    again without being parsed again.
+    '''
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def commit(self):
+        self._conn.commit()
+
+    def lookup(self, path: str, stat: os.stat_result) -> tuple[Optional[BillResult], str]:
+        '''
+        Return the recorded result for path if the file is unchanged, and
+        the file's content hash (hashed only when size or mtime differ).
+        '''
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, content_hash, parser_version, config_fingerprint, "
+            "parsed_data, error, error_type FROM bills WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return None, hash_file(path)
+        size, mtime_ns, content_hash, parser_version, fingerprint, parsed_data, error, error_type = row
+        if parser_version != _PARSER_VERSION or fingerprint != CONFIG_FINGERPRINT:
+            return None, hash_file(path)
+
+        if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            new_hash = hash_file(path) if size == stat.st_size else None
+            if new_hash != content_hash:
+                return None, new_hash or hash_file(path)
+            # Touched or copied over with the same content.
+            self._conn.execute("UPDATE bills SET mtime_ns = ? WHERE path = ?", (stat.st_mtime_ns, path))
+
+        return BillResult(
+            fileName=path,
+            parsedData=json.loads(parsed_data) if parsed_data is not None else None,
+            error=error,
+            errorType=error_type,
+        ), content_hash
+
+    def record(self, path: str, stat: os.stat_result, content_hash: str, result: BillResult):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO bills VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, content_hash, _PARSER_VERSION, CONFIG_FINGERPRINT,
+             json.dumps(result.parsedData) if result.parsedData is not None else None,
+             result.error, result.errorType),
+        )
+
+    def prune(self, directory: str, keep: Iterable[str], recursive: bool = True) -> int:
+        '''
+        Forget bills under directory that are not in keep (deleted or
+        renamed files). Only the folders that were scanned are pruned: with
+        recursive=False that is directory itself, not its subdirectories.
+        Returns the number of entries removed.
+        '''
+        keep = set(keep)
+        prefix = os.path.join(directory, "")
+        top = os.path.normpath(directory)
+        stale = [
+            path for (path,) in self._conn.execute("SELECT path FROM bills")
+            if path.startswith(prefix) and path not in keep
+            and (recursive or os.path.normpath(os.path.dirname(path)) == top)
+        ]
+        self._conn.executemany("DELETE FROM bills WHERE path = ?", [(path,) for path in stale])
+        return len(stale)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM bills").fetchone()[0]
@@ -0,0 +1,113 @@
+#Class ParseMetrics
+import time
+from collections import Counter, defaultdict
+from typing import Optional
+
+STAGES = ("open", "cache", "version", "locate", "scan", "layout", "extract", "parse")
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "ParseMetrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.metrics._child_seconds.append(0.0)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        child = self.metrics._child_seconds.pop()
+        self.metrics.stage_seconds[self.name] += elapsed - child
+        if self.metrics._child_seconds:
+            self.metrics._child_seconds[-1] += elapsed
+        return False
+
+
+class ParseMetrics:
+    '''
+    Counters and timings for one bill or many. Pass one to
+    MyPDFUtils(metrics=...) or parser.parse_file/parse_directory.
+
+    Stage times are exclusive: time spent laying out a page during version
+    detection is charged to "layout", not "version". Skips are counted by
+    reason (coordinate limits, skip lists, v2 total/account-wide guards).
+    '''
+
+    def __init__(self):
+        self.bills = 0
+        self.pages_parsed = 0
+        self.stage_seconds: defaultdict[str, float] = defaultdict(float)
+        self.elements_per_page: Counter = Counter()
+        self.skips: Counter = Counter()
+        self.events: Counter = Counter()
+        self._child_seconds: list[float] = []
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def to_dict(self) -> dict:
+        return {
+            "bills": self.bills,
+            "pagesParsed": self.pages_parsed,
+            "stageSeconds": dict(self.stage_seconds),
+            # JSON object keys are strings; page numbers are restored by merge().
+            "elementsPerPage": {str(page): n for page, n in sorted(self.elements_per_page.items())},
+            "skips": dict(self.skips),
+            "events": dict(self.events),
+        }
+
+    def merge(self, other):
+        '''
+        Add another ParseMetrics, or its to_dict() form (as returned by
+        batch workers), into this one.
+        '''
+        if isinstance(other, ParseMetrics):
+            other = other.to_dict()
+        self.bills += other["bills"]
+        self.pages_parsed += other["pagesParsed"]
+        for stage, seconds in other["stageSeconds"].items():
+            self.stage_seconds[stage] += seconds
+        for page, count in other["elementsPerPage"].items():
+            self.elements_per_page[int(page)] += count
+        self.skips.update(other["skips"])
+        self.events.update(other["events"])
+        return self
+
+    def to_openmetrics(self, prefix: str = "verizon_bill_parser", extra: Optional[dict] = None) -> str:
+        '''
+        Render the counters in the OpenMetrics text format (also accepted by
+        Prometheus). extra adds unlabelled counters, name -> (help, value).
+        '''
+        lines = []
+
+        def family(name: str, help_text: str, samples):
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+                label_text = "{" + label_text + "}" if label_text else ""
+                lines.append(f"{prefix}_{name}_total{label_text} {value}")
+
+        family("bills", "Bills parsed.", [((), self.bills)])
+        family("pages_parsed", "Pages whose elements were parsed.", [((), self.pages_parsed)])
+        family("stage_seconds", "Wall time spent in each parse stage.",
+               [((("stage", stage),), round(seconds, 6)) for stage, seconds in sorted(self.stage_seconds.items())])
+        family("elements", "Text boxes parsed, by PDF page.",
+               [((("page", str(page)),), n) for page, n in sorted(self.elements_per_page.items())])
+        family("skipped_elements", "Text boxes ignored, by reason.",
+               [((("reason", reason),), n) for reason, n in sorted(self.skips.items())])
+        family("events", "Parse decisions, by kind.",
+               [((("event", event),), n) for event, n in sorted(self.events.items())])
+        for name, (help_text, value) in (extra or {}).items():
+            family(name, help_text, [((), value)])
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
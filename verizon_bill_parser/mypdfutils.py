@@ -1,76 +1,65 @@
 #Class MyPDFUtils
-from pdfminer.high_level import extract_pages, LTPage
+from .pdfsession import PdfSession
+from .textbox import TextBox
+from .cache import ParseCache, TEXT_BOXES, TEXT_BOXES_FORMAT, PARSED_DATA, PARSED_DATA_FORMAT, PAGE_INDEX, \
+    hash_bytes, hash_file, make_key
+from .metrics import ParseMetrics
+from .amounts import amount_to_cents
+from .profiles import PROFILES, CONFIG_FINGERPRINT, VersionProfile, get_profile, profile_for_date, normalize_text, \
+    squash_text
+from . import __version__
+import itertools
 import os
 from datetime import datetime
 import re
 import logging
 from collections import deque
-from typing import Optional
+from contextlib import nullcontext
+from typing import Callable, Iterator, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Stand-in for ParseMetrics.stage() when no metrics are collected.
+_NO_STAGE = nullcontext()
+
+# PDF header, which may follow up to 1 KB of leading junk.
+PDF_MAGIC = b"%PDF-"
+
+# Longest run of text boxes a split context header is looked for in.
+MAX_HEADER_BOXES = 8
+
+# v2 line summary row classifiers.
+_NAME_RE = re.compile(r"^[A-Za-z]+\s+[A-Za-z]+$")
+_PHONE_RE = re.compile(r"^\(?\s*(\d{3}-\d{3}-\d{4})\s*\)?$")
+# The Account-wide charges & credits row is not a per-line charge, but its
+# $0.00 (or similar) appears in the same table.
+_ACCOUNTWIDE_LABEL = "account-wide charges & credits"
+_ACCOUNTWIDE_TOKENS = frozenset({"account-wide", "charges", "&", "credits"})
+
 class MyPDFUtils:
 
-    def __init__(self, pdf_file_name, log_level=logging.ERROR):
+    def __init__(self, pdf_file_name, log_level=logging.ERROR, cache: Optional[ParseCache] = None,
+                 trace: Optional[Callable[[dict], None]] = None,
+                 metrics: Optional[ParseMetrics] = None,
+                 data: Optional[Union[bytes, bytearray, memoryview]] = None):
+        '''
+        Parse the bill at pdf_file_name, or the PDF in data when given. With
+        data, pdf_file_name is only the bill's logical name (None if it has
+        none): a MyBill_MM.DD.YYYY.pdf name still dates the bill, anything
+        else falls back to content detection.
+        '''
         logger.setLevel(log_level)
-
-        self.vzwPdfVersions = {
-            "v1": {
-                "dateInit": "01/01/2022",
-                "dateEnd": "12/01/2022",
-                "pagesToParse": [0],
-                "coordinateMaxLimits": {
-                    "x1": 385
-                },
-                "contextMap": {
-                    ".": {
-                        "final": "abcd",
-                        "skip": [
-                            "am a test",
-                            "Smartphone"
-                        ],
-                        "callback": self.v1_parseCharges
-                    }
-                }
-            },
-            "v2": {
-                "dateInit": "10/01/2023",
-                "dateEnd": "10/01/2026",
-                "detectVersionFromContent": {
-                    "page": 0,
-                    "text": "Bill date\nAccount number\nInvoice number\n",
-                    "x0": 276,
-                    "y0": 215,
-                },
-                "pagesToParse": [2],
-                "contextMap": {
-                    "Bill summary by line": {
-                        "final": "abcd",
-                        "skip": [
-                            "am a test",
-                            "Smartphone",
-                            "Questions about your bill?\nverizon.com/support\n800-922-0204",
-                            "Review your bill online",
-                            "An itemized bill breakdown of all\ncharges and credits is available on\nthe My Verizon app and online.",
-                            "Scan the QR code\nwith your camera\napp or go to\ngo.vzw.com/bill.",
-                            "Surcharges, taxes and gov fees",
-                            "New plan added",
-                            "New device added",
-                            "Plan changed",
-                            "Perk added",
-                            "Perk removed",
-                            "Device upgraded",
-                            "Service added",
-                            "Service removed",
-                        ],
-                        "callback": self.v2_parseChargesByLineSummary,
-                        "coordinateMaxLimits": {
-                            "x0": 330
-                        }
-                    }
-                }
-            }
-        }
+        # Hot-path debug output, tracing and metrics are all decided once per parse,
+        # so with logging at the default ERROR level no message is ever formatted.
+        self._debug = logger.isEnabledFor(logging.DEBUG)
+        self.trace = trace
+        self.metrics = metrics
+        self._tracing = trace is not None
+        # Structured decisions are wanted by the trace sink or the skip counters.
+        self._record = self._tracing or metrics is not None
+        self._observe = self._debug or self._record
+        # PDF page the elements being parsed come from, for trace events.
+        self._page_number = 0
 
         self.parsedData = {
             "amounts": [],
@@ -79,33 +68,116 @@ class MyPDFUtils:
             "fileName": pdf_file_name
         }
         self.currentContext = None
+        # Per-parse context state; the shared profiles are never modified.
+        self._closed_contexts: set[str] = set()
+        self.profile: Optional[VersionProfile] = None
         self.amountIndex = 0
-        # Keep a short history of recent text boxes to detect headers that may
-        # be split across multiple PDF text elements in newer bill formats.
-        self._recent_text_boxes: deque[str] = deque(maxlen=8)
+        # Headers may be split across several text boxes in newer bill formats.
+        # Each state is (header trie node, boxes matched) for a run of recent
+        # boxes that spells the start of a header.
+        self._header_states: list[tuple[int, int]] = []
         # Used by v2 parsing to ignore the grand-total amount immediately after a "Total:" label.
         self._v2_total_y0: Optional[float] = None
+        # Set by a callback once it reads the table's closing row (v2: "Total:"),
+        # so the page locator does not look for a continuation page.
+        self._table_ended = False
         # Used by v2 parsing to ignore the Account-wide charges & credits amount (not a per-line charge).
         self._v2_accountwide_y0: Optional[float] = None
-        self._v2_accountwide_token_buf: list[str] = []
+        self._v2_accountwide_token_buf: set[str] = set()
         # Used by v2 parsing to pair $-amounts with line rows reliably.
         self._v2_pending_amount_rows: deque[int] = deque()
         self.pdf_file_name = pdf_file_name
-        self.pdf_file_name_without_folder = self.pdf_file_name.split(os.sep)[-1]
-        self.pdf_file_version = self.get_file_version()
+        if isinstance(data, memoryview) and not data.c_contiguous:
+            # Strided views can be neither hashed nor read in place; copy once.
+            data = data.tobytes()
+        self.data = data
+        self.pdf_file_name_without_folder = self.pdf_file_name.split(os.sep)[-1] if pdf_file_name else ""
+        # Opened on first use and shared by version detection and page extraction.
+        self._session: Optional[PdfSession] = None
+        self.cache = cache
+        # Text-box stream restored from the cache; when set, layout is skipped.
+        self._cached_text_boxes: Optional[dict] = None
+        # Whether the version was detected from the content, not read from the file name.
+        self._version_from_content = False
+        try:
+            if self.cache is not None:
+                with self._stage("cache"):
+                    cache_hit = self.load_from_cache()
+                if cache_hit:
+                    if self.metrics is not None:
+                        self.metrics.bills += 1
+                    return
+
+            with self._stage("version"):
+                self.pdf_file_version = self.get_file_version()
+
+            if not self.pdf_file_version:
+                raise ValueError(
+                    f"Unable to determine Verizon bill PDF version for file: {self.pdf_file_name}"
+                )
+            self.profile = get_profile(self.pdf_file_version)
+
+            # Pages are laid out as the parse reaches them, so the session stays open.
+            with self._stage("parse"):
+                self.parse_data_elements()
+        finally:
+            self.close_session()
+        if self.cache is not None:
+            with self._stage("cache"):
+                self.store_text_boxes()
+                self.cache.put(PARSED_DATA, self._parsed_data_key, {
+                    "version": self.pdf_file_version,
+                    "parsedData": self.parsedData
+                })
+        if self.metrics is not None:
+            self.metrics.bills += 1
+
+    def _stage(self, name: str):
+        return self.metrics.stage(name) if self.metrics is not None else _NO_STAGE
+
+    @property
+    def session(self) -> PdfSession:
+        if self._session is None:
+            with self._stage("open"):
+                self._session = PdfSession(self.pdf_file_name, metrics=self.metrics, data=self.data)
+        return self._session
+
+    def close_session(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
-        if not self.pdf_file_version:
-            raise ValueError(
-                f"Unable to determine Verizon bill PDF version for file: {self.pdf_file_name}"
-            )
+    def load_from_cache(self) -> bool:
+        '''
+        Look the bill up in the cache. Returns True when the final parsed
+        data was found; a text-box hit only lets extract_pages skip layout.
+        While tracing, the parsed data is not looked up so that the parse
+        runs and the trace sees its decisions.
+        '''
+        content_hash = hash_bytes(self.data) if self.data is not None else hash_file(self.pdf_file_name)
+        self._text_boxes_key = make_key(content_hash, __version__, CONFIG_FINGERPRINT, TEXT_BOXES_FORMAT)
+        # The bill date and version can come from the file name, so it is part of the key.
+        self._parsed_data_key = make_key(content_hash, __version__, CONFIG_FINGERPRINT, PARSED_DATA_FORMAT,
+                                         self.pdf_file_name_without_folder)
 
-        self.extract_pages()
-        self.parse_data_elements()
+        cached = None if self._tracing else self.cache.get(PARSED_DATA, self._parsed_data_key)
+        if cached is not None:
+            if self.metrics is not None:
+                self.metrics.events["cache_hit_parsed"] += 1
+            self.pdf_file_version = cached["version"]
+            self.profile = get_profile(self.pdf_file_version)
+            self.parsedData = cached["parsedData"]
+            self.parsedData["fileName"] = self.pdf_file_name
+            return True
+
+        self._cached_text_boxes = self.cache.get(TEXT_BOXES, self._text_boxes_key)
+        if self._cached_text_boxes is not None and self._observe:
+            self._note("cache_hit_text_boxes", f"Text boxes of {self.pdf_file_name} served from the cache")
+        return False
 
     @staticmethod
     def _normalize_text(text: str) -> str:
-        # Collapse whitespace and lowercase for robust matching.
-        return " ".join(text.split()).strip().lower()
+        return normalize_text(text)
     
     def get_file_version_from_filename(self):
         #Extract date from file name
@@ -114,12 +186,10 @@ class MyPDFUtils:
         date = datetime(int(dateParts[2]), int(dateParts[0]), int(dateParts[1]))
         self.parsedData["billDate"] = date.strftime("%m/%d/%Y")
         #Check if date is within the range of any version
-        for version in self.vzwPdfVersions:
-            dateInit = datetime.strptime(self.vzwPdfVersions[version]["dateInit"], "%m/%d/%Y")
-            dateEnd = datetime.strptime(self.vzwPdfVersions[version]["dateEnd"], "%m/%d/%Y")
-            if date >= dateInit and date <= dateEnd:
-                logger.debug(f"File {self.pdf_file_name} is version {version}")
-                return version
+        profile = profile_for_date(date)
+        if profile is not None:
+            logger.debug(f"File {self.pdf_file_name} is version {profile.name}")
+            return profile.name
         logger.warning(f"File {self.pdf_file_name} is not within any version range")
         return None
     
@@ -130,35 +200,83 @@ class MyPDFUtils:
         '''
         elementX0Floor = int(element.x0)
         elementY0Floor = int(element.y0)
-        if elementX0Floor >= detectObj["x0"] - 5 and elementX0Floor <= detectObj["x0"] + 5 \
-            and elementY0Floor >= detectObj["y0"] - 5 and elementY0Floor <= detectObj["y0"] + 5:
+        if elementX0Floor >= detectObj.x0 - 5 and elementX0Floor <= detectObj.x0 + 5 \
+            and elementY0Floor >= detectObj.y0 - 5 and elementY0Floor <= detectObj.y0 + 5:
             return True
         return False
 
+    @staticmethod
+    def _squash_text(text: str) -> str:
+        return squash_text(text)
+
+    def get_file_version_from_text(self) -> Optional[str]:
+        '''
+        Cheap detection tier: look for the detectVersionFromContent lines in
+        the page's content stream text, without layout analysis. Each line
+        must start within 5 pixels of x0 and the last line's baseline must
+        sit just above y0. Returns None when this tier cannot decide.
+        '''
+        for profile in PROFILES:
+            if profile.detect is None:
+                continue
+            detectObj = profile.detect
+            scanned_lines = self.session.scan_lines(detectObj.page)
+            if not scanned_lines:
+                continue
+
+            wanted = [self._squash_text(t) for t in detectObj.text.split("\n") if t.strip()]
+            found_y = []
+            for wanted_text in wanted:
+                for line in scanned_lines:
+                    if abs(line.x - detectObj.x0) <= 5 \
+                        and self._squash_text(line.text).startswith(wanted_text):
+                        found_y.append(line.y)
+                        break
+            # The box's y0 is the bottom of its last line, a descender below the baseline.
+            if len(found_y) == len(wanted) and detectObj.y0 - 5 <= min(found_y) <= detectObj.y0 + 10:
+                logger.debug(f"File {self.pdf_file_name} is version {profile.name} (content stream scan)")
+                return profile.name
+        return None
+
     def get_file_version_from_content(self) -> str:
-        for version in self.vzwPdfVersions:
-            if "detectVersionFromContent" in self.vzwPdfVersions[version]:
-                detectObj = self.vzwPdfVersions[version]["detectVersionFromContent"]
-                pageNumber = detectObj["page"]
-                for page_layout in extract_pages(self.pdf_file_name, page_numbers=[pageNumber]):
-                    for element in page_layout:
-                        if element.__class__.__name__ == "LTTextBoxHorizontal":
-                            if self.match_coordinates(element, detectObj) \
-                                and element.get_text() == detectObj["text"]:
-                                return version
-                            # elif 'Bill date' in element.get_text():
-                            #     print("Bill date found")       
+        self._version_from_content = True
+        if self._cached_text_boxes is not None and self._cached_text_boxes["versionFromContent"]:
+            # The text boxes were cached for this exact content, along with the version detected from it.
+            # A version read from a MyBill_ file name says nothing about what detection would find.
+            return self._cached_text_boxes["version"]
+
+        version = self.get_file_version_from_text()
+        if version is not None:
+            return version
+
+        # Fall back to full layout analysis of the detection page.
+        for profile in PROFILES:
+            if profile.detect is not None:
+                detectObj = profile.detect
+                text_boxes = self.session.text_boxes(detectObj.page)
+                if text_boxes is not None:
+                    for element in text_boxes:
+                        if self.match_coordinates(element, detectObj) \
+                            and element.text == detectObj.text:
+                            return profile.name
         return None
         
     def get_file_version(self):
         '''
         File name should be in the format MyBill_MM.DD.YYYY.pdf
         extract the date from the file name and return the version of the file
-        by looking up the date in the vzwPdfVersions dictionary
+        by looking up the date in the version profiles
         '''
         logger.debug(f"Get file version for file: {self.pdf_file_name}")
+        if self.data is not None:
+            # In-memory bill: the content is at hand, and the logical name
+            # (e.g. an object storage key) need not end in .pdf.
+            if PDF_MAGIC not in bytes(memoryview(self.data)[:1024]):
+                raise Exception(f"File {self.pdf_file_name or '<in-memory>'} is not a PDF file")
+            if self.pdf_file_name is None:
+                return self.get_file_version_from_content()
         #Check if the file is a PDF file
-        if not self.pdf_file_name.endswith(".pdf"):
+        elif not self.pdf_file_name.endswith(".pdf"):
             raise Exception(f"File {self.pdf_file_name} is not a PDF file")
         
         #Check if the file name is in the MyBill_MM.DD.YYYY.pdf format
@@ -169,48 +287,183 @@ class MyPDFUtils:
             logger.debug(f"File {self.pdf_file_name} starts with MyBill_")
             return self.get_file_version_from_filename()
 
-    def extract_pages(self):
-        self.pdf_extracted_pages: list[LTPage] = []
-        for pagenumber in self.vzwPdfVersions[self.pdf_file_version]["pagesToParse"]:
-            for page_layout in extract_pages(self.pdf_file_name, page_numbers=[pagenumber]):
-                self.pdf_extracted_pages.append(page_layout)
-                #print("Page Number: " + str(pagenumber))
+    def _page_has_header(self, page_number: int) -> Optional[bool]:
+        '''
+        Whether a line of the page's content stream text starts with one of
+        the profile's context headers, "Bill summary by line (continued)"
+        included. None when the page does not exist.
+        '''
+        scanned_lines = self.session.scan_lines(page_number)
+        if scanned_lines is None:
+            return None
+        for line in scanned_lines:
+            squashed = self._squash_text(line.text)
+            for context in self.profile.contexts.values():
+                if squashed.startswith(context.squashed_header):
+                    return True
+        return False
+
+    def _context_opened(self) -> bool:
+        return self.currentContext is not None or bool(self._closed_contexts)
+
+    def locate_pages(self) -> Iterator[int]:
+        '''
+        Yield the pages holding the profile's table. The pagesToParse pages
+        are laid out directly, as without the locator; only when none of
+        them opens a context are the other pages scanned (content stream
+        text, no layout) for one that does. Pages that merely mention the
+        header are passed over. While a context is still open at the end of
+        the table's last page and its closing row has not been read, the
+        next page follows if it repeats a header.
+        '''
+        if self.cache is not None:
+            cached = self.cache.get(PAGE_INDEX, self._text_boxes_key)
+            if cached is not None:
+                yield from cached["pages"]
+                return
+
+        for page in self.profile.pages_to_parse:
+            yield page
+        # The table's pages, cached once finding them took a scan.
+        table = list(self.profile.pages_to_parse)
+        scanned = False
+        try:
+            if not self._context_opened():
+                table = []
+                scanned = True
+                for page in itertools.count():
+                    if page in self.profile.pages_to_parse:
+                        continue
+                    with self._stage("locate"):
+                        found = self._page_has_header(page)
+                    if found is None:
+                        logger.warning(f"No page of {self.pdf_file_name} opens a {self.profile.name} table")
+                        return
+                    if found:
+                        yield page
+                        if self._context_opened():
+                            table = [page]
+                            break
+                        logger.debug(f"Page {page} of {self.pdf_file_name} mentions a table header but opens no context")
+
+            while self.currentContext is not None and not self._table_ended and table:
+                scanned = True
+                with self._stage("locate"):
+                    if not self._page_has_header(table[-1] + 1):
+                        return
+                table.append(table[-1] + 1)
+                yield table[-1]
+        finally:
+            if scanned and table and self.cache is not None:
+                if self._debug:
+                    logger.debug(f"File {self.pdf_file_name} tables are on pages {table}")
+                self.cache.put(PAGE_INDEX, self._text_boxes_key, {"pages": table})
+
+    def iter_pages(self) -> Iterator[tuple[int, list[TextBox]]]:
+        '''
+        Yield (page number, text boxes) for the pages to parse, one page at a
+        time, from the text-box cache or laid out only when the parse asks
+        for it. Laid out pages are kept in pdf_extracted_pages only when they
+        are going to be written to the cache.
+        '''
+        self.pdf_extracted_pages: list[list[TextBox]] = []
+        self.pdf_extracted_page_numbers: list[int] = []
+        self._text_boxes_from_cache = self._cached_text_boxes is not None \
+            and self._cached_text_boxes["version"] == self.pdf_file_version
+        if self._text_boxes_from_cache:
+            for pagenumber, page in zip(self._cached_text_boxes["pageNumbers"], self._cached_text_boxes["pages"]):
+                yield pagenumber, [TextBox.from_row(row) for row in page]
+            return
+
+        page_numbers = self.locate_pages() if self.profile.locate_pages else self.profile.pages_to_parse
+        for pagenumber in page_numbers:
+            with self._stage("extract"):
+                text_boxes = self.session.text_boxes(pagenumber, keep=False)
+            if text_boxes is None:
+                continue
+            if self.cache is not None:
+                self.pdf_extracted_pages.append(text_boxes)
+                self.pdf_extracted_page_numbers.append(pagenumber)
+            yield pagenumber, text_boxes
+
+    def store_text_boxes(self):
+        '''
+        Cache the pages laid out by this parse. When the parse stopped early
+        these are only the pages it needed, which is all a parse of the same
+        file with the same config will ever read.
+        '''
+        if self._text_boxes_from_cache:
+            return
+        self.cache.put(TEXT_BOXES, self._text_boxes_key, {
+            "version": self.pdf_file_version,
+            "versionFromContent": self._version_from_content,
+            "pageNumbers": self.pdf_extracted_page_numbers,
+            "pages": [[box.to_row() for box in page] for page in self.pdf_extracted_pages]
+        })
+
+    def _note(self, event: str, message: str, **fields):
+        '''
+        Report a parse decision to the debug log, the metrics counters and the
+        trace sink. Callers check self._observe first so nothing is built when
+        all are off; decisions not worth a log line pass an empty message.
+        '''
+        if self._debug and message:
+            logger.debug(message)
+        if self.metrics is not None:
+            if event == "skip":
+                self.metrics.skips[fields["reason"]] += 1
+            elif event != "element":
+                self.metrics.events[event] += 1
+        if self._tracing:
+            fields["event"] = event
+            fields["page"] = self._page_number
+            self.trace(fields)
 
     def parse_data_elements(self):
-        for page in self.pdf_extracted_pages:
-            for element in page:
-                # If element text is present then log it (avoid noisy empty text).
-                if hasattr(element, "get_text"):
-                    text = element.get_text()
-                    if text and text.strip():
-                        logger.debug(f"Element Text: {text}")
-
-                if element.__class__.__name__ == "LTTextContainer":
-                    self.parse_element("TextLine", element)
-                elif element.__class__.__name__ == "LTTextBoxHorizontal":
+        '''
+        Feed the text boxes of the pages to parse through parse_element, and
+        stop (without laying out any further page) once every context of the
+        profile has seen its final marker.
+        '''
+        context_count = len(self.profile.contexts)
+        pages = self.iter_pages()
+        try:
+            for self._page_number, page in pages:
+                if self.metrics is not None:
+                    self.metrics.pages_parsed += 1
+                for index, element in enumerate(page):
+                    # If element text is present then log it (avoid noisy empty text).
+                    if (self._debug or self._tracing) and element.text.strip():
+                        self._note("element", f"Element Text: {element.text}", text=element.text,
+                                   x0=element.x0, y0=element.y0, x1=element.x1, y1=element.y1)
                     self.parse_element("TextBox", element)
-                elif element.__class__.__name__ == "LTChar":
-                    self.parse_element("Char", element)
-                elif element.__class__.__name__ == "LTAnno":
-                    self.parse_element("Anno", element)
+                    if len(self._closed_contexts) == context_count:
+                        if self.metrics is not None:
+                            self.metrics.elements_per_page[self._page_number] += index + 1
+                        if self._observe:
+                            self._note("parse_done", "All contexts closed, stopping", skipped=len(page) - index - 1)
+                        return
+                if self.metrics is not None:
+                    self.metrics.elements_per_page[self._page_number] += len(page)
+        finally:
+            pages.close()
     
-    def parse_element(self, eltype: str, element):
+    def parse_element(self, eltype: str, element: TextBox):
         if eltype != "TextBox":
             return
         
-        if self.currentContext != None and 'coordinateMaxLimits' in self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext]:
-            if 'x0' in self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext]["coordinateMaxLimits"]:
-                elementX0Floor = int(element.x0)
-                if elementX0Floor > self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext]["coordinateMaxLimits"]["x0"]:
-                    # logger.debug(f"Element x0 {elementX0Floor} exceeds max limit, text: {element.get_text()}")
-                    return
-            if 'y0' in self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext]["coordinateMaxLimits"]:
-                elementY0Floor = int(element.y0)
-                if elementY0Floor > self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext]["coordinateMaxLimits"]["y0"]:
-                    # logger.debug(f"Element y0 {elementY0Floor} exceeds max limit, text: {element.get_text()}")
-                    return
-                
-        elementText = element.get_text()
+        context = self.profile.contexts[self.currentContext] if self.currentContext is not None else None
+        if context is not None:
+            if context.max_x0 is not None and int(element.x0) > context.max_x0:
+                if self._record:
+                    self._note("skip", "", reason="x0_limit", text=element.text)
+                return
+            if context.max_y0 is not None and int(element.y0) > context.max_y0:
+                if self._record:
+                    self._note("skip", "", reason="y0_limit", text=element.text)
+                return
+
+        elementText = element.text
         #If the last two characters of elementText are \n then remove them
         if elementText.endswith("\n"):
             elementText = elementText[:-1]
@@ -218,48 +471,67 @@ class MyPDFUtils:
         elementText = elementText.strip()
 
         # Track recent text boxes for multi-box header detection.
-        if elementText:
-            self._recent_text_boxes.append(elementText)
-        
-        logger.debug(f"TextBox={elementText}")
-
-        if self.currentContext is None:
-            context_map = self.vzwPdfVersions[self.pdf_file_version]["contextMap"]
+        joined_header = self._advance_header_states(elementText) if elementText else None
 
+        if context is None:
             # 1) Exact match (historical behavior)
-            if elementText in context_map:
+            if elementText in self.profile.contexts and elementText not in self._closed_contexts:
                 self.currentContext = elementText
-                logger.debug(f"Context: {self.currentContext}")
+                if self._observe:
+                    self._note("context_open", f"Context: {self.currentContext}",
+                               context=self.currentContext, via="exact")
             else:
-                # 2) Robust match: join last N text boxes and compare against context keys.
-                normalized_keys = {self._normalize_text(k): k for k in context_map.keys()}
-                recent_normalized = [self._normalize_text(t) for t in self._recent_text_boxes if t]
-                max_window = min(len(recent_normalized), 8)
-                matched_key = None
-                for window_size in range(2, max_window + 1):
-                    candidate = " ".join(recent_normalized[-window_size:])
-                    if candidate in normalized_keys:
-                        matched_key = normalized_keys[candidate]
-                        break
-
-                if matched_key is not None:
-                    self.currentContext = matched_key
-                    logger.debug(f"Context: {self.currentContext} (via joined text boxes)")
-        elif self.currentContext != None and elementText == self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext]["final"]:
-            del self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext]
+                # 2) Robust match: the last N text boxes joined spell a context header.
+                if joined_header is not None:
+                    self.currentContext = joined_header
+                    if self._observe:
+                        self._note("context_open", f"Context: {self.currentContext} (via joined text boxes)",
+                                   context=self.currentContext, via="joined")
+                elif self._record:
+                    self._note("skip", "", reason="no_context", text=elementText)
+        elif elementText == context.final:
+            self._closed_contexts.add(self.currentContext)
             self.currentContext = None
-            logger.debug("Context: None")
-        elif self.currentContext != None and \
-            "callback" in self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext] \
-            and elementText not in self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext]["skip"]:
-            self.vzwPdfVersions[self.pdf_file_version]["contextMap"][self.currentContext]["callback"](elementText, element)
-            logger.debug(f"Callback invoked for context {self.currentContext} with text: {elementText}")
-
-        logger.debug(f"Element Type: {eltype}")
+            if self._observe:
+                self._note("context_close", "Context: None", context=context.header)
+        elif self.profile.locate_pages and self._squash_text(elementText).startswith(context.squashed_header):
+            # The header repeated on a continuation page.
+            if self._record:
+                self._note("skip", "", reason="header_repeat", text=elementText)
+        elif context.callback is not None and elementText not in context.skip:
+            getattr(self, context.callback)(elementText, element)
+        elif self._observe:
+            self._note("skip", f"Skipping text in skip list: {elementText}", reason="skip_list", text=elementText)
     
+    def _advance_header_states(self, elementText: str) -> Optional[str]:
+        '''
+        Feed one non-empty text box to the header trie. Returns the open
+        header spelled by the shortest run of 2 to MAX_HEADER_BOXES boxes
+        ending with this one, if any. The work per box depends on the
+        number of runs in progress, not on how many headers there are.
+        '''
+        trie = self.profile.header_trie
+        words = elementText.lower().split()
+        states = []
+        matched = None
+        for node, boxes in self._header_states + [(0, 0)]:
+            node = trie.advance(node, words)
+            if node < 0:
+                continue
+            boxes += 1
+            header = trie.headers[node]
+            if header is not None and boxes >= 2 and header not in self._closed_contexts:
+                # States are oldest first, so a later match is a shorter run.
+                matched = header
+            if boxes < MAX_HEADER_BOXES and trie.children[node]:
+                states.append((node, boxes))
+        self._header_states = states
+        return matched
+
     def v2_append_amount(self, elementText):
         amountDict = {
-            "amount": None
+            "amount": None,
+            "amountCents": None
         }
 
         # Common shapes observed:
@@ -268,7 +540,7 @@ class MyPDFUtils:
         lines = [ln.strip() for ln in elementText.split("\n") if ln.strip()]
         if len(lines) >= 2:
             # Treat first line as a name when it looks like "First Last".
-            if re.match(r"^[A-Za-z]+\s+[A-Za-z]+$", lines[0]):
+            if _NAME_RE.match(lines[0]):
                 amountDict["name"] = lines[0]
                 amountDict["description"] = " ".join(lines[1:])
             else:
@@ -278,7 +550,9 @@ class MyPDFUtils:
 
         self.parsedData["amounts"].append(amountDict)
         self._v2_pending_amount_rows.append(len(self.parsedData["amounts"]) - 1)
-        logger.debug(f"Appended amount: {amountDict}")
+        if self._observe:
+            self._note("row", f"Appended amount: {amountDict}", row=len(self.parsedData["amounts"]) - 1,
+                       text=elementText, data=dict(amountDict))
     
     def v2_parseChargesByLineSummary(self, elementText, element):
         normalized = self._normalize_text(elementText)
@@ -286,85 +560,106 @@ class MyPDFUtils:
         # Detect and skip the Account-wide charges & credits row.
         # This row is not a per-line charge, but its $0.00 (or similar) appears in the same table and can
         # shift amount alignment if we don't explicitly ignore it.
-        accountwide_full = "account-wide charges & credits"
-        accountwide_tokens = {"account-wide", "charges", "&", "credits"}
-
-        if normalized == accountwide_full:
-            self._v2_accountwide_y0 = float(getattr(element, "y0", 0.0))
-            logger.debug("Skipping v2 account-wide label")
+        if normalized == _ACCOUNTWIDE_LABEL:
+            self._v2_accountwide_y0 = float(element.y0)
+            if self._observe:
+                self._note("skip", "Skipping v2 account-wide label", reason="v2_accountwide_label", text=elementText)
             return
 
-        if normalized in accountwide_tokens:
-            self._v2_accountwide_token_buf.append(normalized)
+        if normalized in _ACCOUNTWIDE_TOKENS:
+            self._v2_accountwide_token_buf.add(normalized)
             # When we have seen all tokens (order-insensitive), treat it as the account-wide label.
-            if set(self._v2_accountwide_token_buf) >= accountwide_tokens:
-                self._v2_accountwide_y0 = float(getattr(element, "y0", 0.0))
+            if self._v2_accountwide_token_buf >= _ACCOUNTWIDE_TOKENS:
+                self._v2_accountwide_y0 = float(element.y0)
                 self._v2_accountwide_token_buf.clear()
-                logger.debug("Skipping v2 account-wide label (split tokens)")
-            else:
-                logger.debug(f"Skipping v2 account-wide token: {elementText}")
+                if self._observe:
+                    self._note("skip", "Skipping v2 account-wide label (split tokens)",
+                               reason="v2_accountwide_label", text=elementText)
+            elif self._observe:
+                self._note("skip", f"Skipping v2 account-wide token: {elementText}",
+                           reason="v2_accountwide_token", text=elementText)
             return
 
         # Ignore totals row; the $-amount on the same line is the grand total, not a line item.
         if normalized == "total:":
-            self._v2_total_y0 = float(getattr(element, "y0", 0.0))
-            logger.debug("Skipping v2 total label")
+            self._v2_total_y0 = float(element.y0)
+            self._table_ended = True
+            if self._observe:
+                self._note("skip", "Skipping v2 total label", reason="v2_total_label", text=elementText)
             return
 
         if elementText.startswith("$"):
-            amount_y0 = float(getattr(element, "y0", 0.0))
+            amount_y0 = float(element.y0)
 
             # Skip account-wide amount if it appears on the same row.
             if self._v2_accountwide_y0 is not None and abs(amount_y0 - self._v2_accountwide_y0) <= 6:
-                logger.debug(f"Skipping v2 account-wide amount: {elementText}")
+                if self._observe:
+                    self._note("skip", f"Skipping v2 account-wide amount: {elementText}",
+                               reason="v2_accountwide_amount", text=elementText)
                 self._v2_accountwide_y0 = None
                 return
 
             # Skip grand total amount if it appears on the same row as the Total: label.
             if self._v2_total_y0 is not None and abs(amount_y0 - self._v2_total_y0) <= 6:
-                logger.debug(f"Skipping v2 grand total amount: {elementText}")
+                if self._observe:
+                    self._note("skip", f"Skipping v2 grand total amount: {elementText}",
+                               reason="v2_total_amount", text=elementText)
                 self._v2_total_y0 = None
                 return
 
             # Only assign amounts to rows we've explicitly created.
             if not self._v2_pending_amount_rows:
-                logger.debug(f"Skipping v2 amount without pending row: {elementText}")
+                if self._observe:
+                    self._note("skip", f"Skipping v2 amount without pending row: {elementText}",
+                               reason="v2_no_pending_row", text=elementText)
                 return
 
             row_index = self._v2_pending_amount_rows.popleft()
             self.parsedData["amounts"][row_index]["amount"] = elementText
+            self.parsedData["amounts"][row_index]["amountCents"] = amount_to_cents(elementText)
+            if self._observe:
+                self._note("amount", f"Assigned {elementText} to row {row_index}", row=row_index, text=elementText)
         else:
             # If the phone number comes as its own text box, attach it to the last row.
-            phone_match = re.match(r"^\(?\s*(\d{3}-\d{3}-\d{4})\s*\)?$", elementText.strip())
+            phone_match = _PHONE_RE.match(elementText.strip())
             if phone_match and self.parsedData["amounts"]:
                 last = self.parsedData["amounts"][-1]
                 if last.get("phoneNum") is None:
                     last["phoneNum"] = phone_match.group(1)
-                    logger.debug(f"Attached phoneNum to last row: {last['phoneNum']}")
+                    if self._observe:
+                        self._note("phone", f"Attached phoneNum to last row: {last['phoneNum']}",
+                                   row=len(self.parsedData["amounts"]) - 1, text=elementText)
                     return
             self.v2_append_amount(elementText)
-        logger.debug(f"v2_parseChargesByLineSummary: {elementText}")
         
     def v1_parseCharges(self, elementText, element):
         if not self.checkCoordinateLimits(element):
+            if self._record:
+                self._note("skip", "", reason="x1_limit", text=elementText)
             return
     
         if elementText.startswith("$"):
             self.parsedData["amounts"][self.amountIndex]["amount"] = elementText
+            self.parsedData["amounts"][self.amountIndex]["amountCents"] = amount_to_cents(elementText)
+            if self._observe:
+                self._note("amount", f"v1_parseCharges: {elementText}", row=self.amountIndex, text=elementText)
             self.amountIndex += 1
         else:
             elementText = elementText.replace("\n", " ")
             self.parsedData["amounts"].append(
                     {
                         "description": elementText,
-                        "amount": None
+                        "amount": None,
+                        "amountCents": None
                     }
                 )
-        logger.debug(f"v1_parseCharges: {elementText}")
+            if self._observe:
+                self._note("row", f"v1_parseCharges: {elementText}", row=len(self.parsedData["amounts"]) - 1,
+                           text=elementText, data={"description": elementText, "amount": None})
 
     def checkCoordinateLimits(self, element):
-        if "coordinateMaxLimits" in self.vzwPdfVersions[self.pdf_file_version]:
-            if element.x1 > self.vzwPdfVersions[self.pdf_file_version]["coordinateMaxLimits"]["x1"]:
+        if self.profile.max_x1 is not None:
+            if element.x1 > self.profile.max_x1:
                 return False
         return True
     
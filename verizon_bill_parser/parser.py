@@ -1,6 +1,12 @@
 import os
 from .mypdfutils import MyPDFUtils
+from .batch import BillResult, BatchReport, iter_parse_files, parse_batch
+from .cache import ParseCache
+from .metrics import ParseMetrics
+from .aio import AsyncBillParser, aparse_file, aparse_many
+from .manifest import BillManifest
 import logging
+from typing import BinaryIO, Optional, Union
 
 logger = logging.getLogger(__name__)
 def parse():
@@ -9,22 +15,148 @@ def parse():
 def set_logger_level(level: str):
     logger.setLevel(level)
 
-def parse_file(file_path: str):
-    if not os.path.exists(file_path):
-        raise Exception(f"File {file_path} does not exist")
+def parse_file(file_path: Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO],
+               cache: Optional[ParseCache] = None, trace=None,
+               metrics: Optional[ParseMetrics] = None, attach_metrics: bool = False,
+               file_name: Optional[str] = None):
+    '''
+    Parse a single bill. file_path is a path, or the PDF itself as bytes, a
+    memoryview or a binary stream; file_name then gives the bill's logical
+    name (e.g. its object storage key), used for date based version
+    detection and returned as parsedData["fileName"].
+
+    trace, when given, is called with a dict for every context transition
+    and element decision (see verizon_bill_parser.trace). The bill's stage
+    timings and counters are added to metrics, and with attach_metrics=True
+    also returned under parsedData["metrics"].
+    '''
+    data = None
+    if isinstance(file_path, (str, os.PathLike)):
+        file_path = os.fspath(file_path)
+        if not os.path.exists(file_path):
+            raise Exception(f"File {file_path} does not exist")
+    elif isinstance(file_path, (bytes, bytearray, memoryview)):
+        data, file_path = file_path, file_name
+    elif hasattr(file_path, "read"):
+        # A stream may not be seekable and hashing for the cache needs all of it anyway.
+        data, file_path = file_path.read(), file_name
+    else:
+        raise TypeError(f"Cannot parse a bill from {type(file_path).__name__}")
     
-    pdfUtils = MyPDFUtils(pdf_file_name=file_path, log_level=logger.level)
+    billMetrics = ParseMetrics() if metrics is not None or attach_metrics else None
+    pdfUtils = MyPDFUtils(pdf_file_name=file_path, log_level=logger.level, cache=cache, trace=trace,
+                          metrics=billMetrics, data=data)
+    if metrics is not None:
+        metrics.merge(billMetrics)
+    if attach_metrics:
+        pdfUtils.parsedData["metrics"] = billMetrics.to_dict()
     return pdfUtils.parsedData
 
-def parse_directory(directory: str):
-    resp_list = []
+def list_directory(directory: str):
     #Check if the directory exists
     if not os.path.exists(directory):
         raise Exception(f"Directory {directory} does not exist")
-    
-    for filename in os.listdir(directory):
+
+    file_paths = []
+    for filename in sorted(os.listdir(directory)):
         file_path = os.path.join(directory, filename)
-        logger.debug(f"Processing file: {file_path}")
         if os.path.isfile(file_path):
-            resp_list.append(parse_file(file_path))
-    return resp_list
\ No newline at end of file
+            file_paths.append(file_path)
+    return file_paths
+
+def walk_pdfs(directory: str, recursive: bool = True):
+    '''
+    Yield (path, stat) for every .pdf file under directory, in sorted order,
+    descending into subdirectories when recursive. Other files are ignored.
+    '''
+    with os.scandir(directory) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if recursive:
+                yield from walk_pdfs(entry.path, recursive)
+        elif entry.name.endswith(".pdf") and entry.is_file():
+            yield entry.path, entry.stat()
+
+def iter_parse_directory(directory: str, workers: Optional[int] = None,
+                         cache: Optional[ParseCache] = None):
+    '''
+    Yield a BillResult per file as soon as it is parsed. Failures are
+    reported on the result instead of being raised.
+    '''
+    file_paths = list_directory(directory)
+    logger.debug(f"Processing {len(file_paths)} files in {directory}")
+    return iter_parse_files(file_paths, workers=workers, log_level=logger.level, cache=cache)
+
+def parse_directory(directory: str, workers: Optional[int] = None, errors: str = "raise",
+                    cache: Optional[ParseCache] = None, metrics: Optional[ParseMetrics] = None,
+                    attach_metrics: bool = False):
+    '''
+    Parse every file in the directory over a pool of worker processes and
+    return the parsed data sorted by file name.
+    errors="raise" stops at the first failure and raises it (as its
+    original type when that is a built-in one, see BillResult.raise_error),
+    errors="skip" leaves failed files out of the result.
+    With a ParseCache, unchanged bills are served from the cache.
+    metrics and attach_metrics work as in parse_file, summed over all bills.
+    '''
+    if errors not in ("raise", "skip"):
+        raise ValueError(f"Invalid errors mode: {errors}")
+
+    file_paths = list_directory(directory)
+    report = parse_batch(file_paths, workers=workers, log_level=logger.level, cache=cache,
+                         metrics=metrics, attach_metrics=attach_metrics, fail_fast=errors == "raise")
+    if errors == "raise" and report.errors:
+        report.errors[0].raise_error()
+    return [result.parsedData for result in report.results]
+
+def parse_directory_incremental(directory: str, manifest: Union[str, BillManifest],
+                                workers: Optional[int] = None, errors: str = "raise",
+                                cache: Optional[ParseCache] = None, recursive: bool = True):
+    '''
+    Parse the PDFs under directory, reusing the results recorded in manifest
+    (a BillManifest or the path of its SQLite file) for bills whose size,
+    mtime or content have not changed since. Only new and changed bills are
+    parsed, then recorded; bills that fail are parsed again on the next
+    run. Non-PDF files are skipped, and bills no longer in
+    the folder are dropped from the manifest. Returns the parsed data of
+    every bill sorted by path; errors works as in parse_directory.
+    '''
+    if errors not in ("raise", "skip"):
+        raise ValueError(f"Invalid errors mode: {errors}")
+    if not os.path.exists(directory):
+        raise Exception(f"Directory {directory} does not exist")
+
+    owns_manifest = not isinstance(manifest, BillManifest)
+    if owns_manifest:
+        manifest = BillManifest(manifest)
+    try:
+        results = {}
+        changed = {}
+        for file_path, stat in walk_pdfs(directory, recursive):
+            known, content_hash = manifest.lookup(file_path, stat)
+            if known is not None:
+                results[file_path] = known
+            else:
+                changed[file_path] = (stat, content_hash)
+        logger.debug(f"{len(results)} bills unchanged, {len(changed)} to parse in {directory}")
+
+        for result in iter_parse_files(changed, workers=workers, log_level=logger.level, cache=cache):
+            if result.ok:
+                # Failures are not recorded, so they are retried on the next run.
+                stat, content_hash = changed[result.fileName]
+                manifest.record(result.fileName, stat, content_hash, result)
+            results[result.fileName] = result
+        manifest.prune(directory, results, recursive)
+        manifest.commit()
+    finally:
+        if owns_manifest:
+            manifest.close()
+
+    ordered = [results[file_path] for file_path in sorted(results)]
+    failed = [result for result in ordered if not result.ok]
+    for result in failed:
+        logger.warning(f"Failed to parse {result.fileName}: {result.error}")
+    if errors == "raise" and failed:
+        failed[0].raise_error()
+    return [result.parsedData for result in ordered if result.ok]
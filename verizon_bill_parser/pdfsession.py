@@ -0,0 +1,252 @@
+#Class PdfSession
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LAParams, LTPage
+from pdfminer.pdfdevice import PDFTextDevice
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from .textbox import TextBox, text_boxes_from_layout
+from .metrics import ParseMetrics
+from contextlib import nullcontext
+import mmap
+from pdfminer import utils
+import logging
+from typing import NamedTuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class ScannedLine(NamedTuple):
+    '''
+    Text shown on one baseline, in content-stream order, and the device
+    space point where it starts.
+    '''
+    text: str
+    x: float
+    y: float
+
+
+class TextScanDevice(PDFTextDevice):
+    '''
+    Collects the text a page shows without building any layout objects:
+    no LTChar, no line/box grouping. Consecutive strings drawn on the same
+    baseline are joined into one ScannedLine.
+    '''
+
+    # Strings whose baselines differ by less than this are on the same line.
+    BASELINE_TOLERANCE = 1.0
+
+    def __init__(self, rsrcmgr: PDFResourceManager):
+        PDFTextDevice.__init__(self, rsrcmgr)
+        self.lines: list[ScannedLine] = []
+        self._chars: list[str] = []
+
+    def begin_page(self, page, ctm):
+        PDFTextDevice.begin_page(self, page, ctm)
+        self.lines = []
+
+    def render_string(self, textstate, seq, ncs, graphicstate):
+        matrix = utils.mult_matrix(textstate.matrix, self.ctm)
+        (x, y) = utils.apply_matrix_pt(matrix, textstate.linematrix)
+        self._chars = []
+        PDFTextDevice.render_string(self, textstate, seq, ncs, graphicstate)
+        text = "".join(self._chars)
+        if not text:
+            return
+        if self.lines and abs(self.lines[-1].y - y) < self.BASELINE_TOLERANCE:
+            last = self.lines[-1]
+            self.lines[-1] = ScannedLine(last.text + " " + text, min(last.x, x), last.y)
+        else:
+            self.lines.append(ScannedLine(text, x, y))
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+        try:
+            self._chars.append(font.to_unichr(cid))
+        except PDFUnicodeNotDefined:
+            pass
+        return font.char_width(cid) * fontsize * scaling
+
+
+class BufferReader:
+    '''
+    Read-only file object over an in-memory PDF (bytes, bytearray or
+    memoryview). Only the chunks pdfminer reads are copied, never the
+    whole buffer, unless it is a non-contiguous view.
+    '''
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        view = memoryview(data)
+        if not view.c_contiguous:
+            view = memoryview(view.tobytes())
+        self._view = view.cast("B")
+        self._pos = 0
+        self.closed = False
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        chunk = self._view[self._pos:end].tobytes()
+        self._pos = max(end, self._pos)
+        return chunk
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += len(self._view)
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+            self.closed = True
+
+
+def open_pdf(pdf_file_name: str):
+    '''
+    Open a local PDF memory-mapped, so pdfminer's repeated seeks and reads
+    are served from the page cache without copying through a file buffer.
+    Returns the object to read from and the file handle to close with it.
+    '''
+    f = open(pdf_file_name, "rb")
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), f
+    except (ValueError, OSError):
+        # Empty files and special files cannot be mapped; read them normally.
+        return f, None
+
+
+class PdfSession:
+    '''
+    One open PDF document shared by every stage that reads a bill.
+
+    The file handle, parsed xref/document, resource manager (with its font
+    cache) and page objects are created once; layout analysis runs only on
+    the pages that are asked for and each page is laid out at most once.
+    Laid out pages are reduced to TextBox lists straight away, so no LTPage
+    tree outlives the call that built it.
+
+    scan_lines skips layout analysis but still runs the full pdfminer
+    interpreter over the page, so the saving is modest: a scan costs from
+    about a third to 60% of a layout, depending on the bill (the benchmark
+    runner reports both stages).
+    '''
+
+    def __init__(self, pdf_file_name: Optional[str], laparams: Optional[LAParams] = None,
+                 metrics: Optional[ParseMetrics] = None,
+                 data: Optional[Union[bytes, bytearray, memoryview]] = None):
+        '''
+        Opens pdf_file_name, or reads the PDF from data when given (then
+        pdf_file_name is only used in messages).
+        '''
+        self.pdf_file_name = pdf_file_name
+        self.metrics = metrics
+        self.laparams = laparams if laparams is not None else LAParams()
+        self._file = None
+        if data is not None:
+            self.fp = BufferReader(data)
+        else:
+            self.fp, self._file = open_pdf(pdf_file_name)
+        try:
+            self.parser = PDFParser(self.fp)
+            self.document = PDFDocument(self.parser)
+        except Exception:
+            self._close_files()
+            raise
+        self.resource_manager = PDFResourceManager(caching=True)
+        self.device = PDFPageAggregator(self.resource_manager, laparams=self.laparams)
+        self.interpreter = PDFPageInterpreter(self.resource_manager, self.device)
+        # The page tree is walked lazily and only as far as the highest page requested.
+        self._page_iter = PDFPage.create_pages(self.document)
+        self._pages: list[PDFPage] = []
+        self._text_boxes: dict[int, list[TextBox]] = {}
+        self._scan_device: Optional[TextScanDevice] = None
+        self._scanned_lines: dict[int, list[ScannedLine]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._text_boxes.clear()
+        self._scanned_lines.clear()
+        self._close_files()
+
+    def _close_files(self):
+        if not self.fp.closed:
+            self.fp.close()
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def get_page(self, page_number: int) -> Optional[PDFPage]:
+        while len(self._pages) <= page_number:
+            page = next(self._page_iter, None)
+            if page is None:
+                return None
+            self._pages.append(page)
+        return self._pages[page_number]
+
+    def layout_page(self, page_number: int) -> Optional[LTPage]:
+        '''
+        Run layout analysis on a single page and return pdfminer's LTPage.
+        '''
+        page = self.get_page(page_number)
+        if page is None:
+            logger.warning(f"Page {page_number} not found in {self.pdf_file_name}")
+            return None
+        with self.metrics.stage("layout") if self.metrics is not None else nullcontext():
+            self.interpreter.process_page(page)
+        layout = self.device.get_result()
+        # Do not let the aggregator pin the page tree until the next page.
+        self.device.result = None
+        return layout
+
+    def text_boxes(self, page_number: int, keep: bool = True) -> Optional[list[TextBox]]:
+        '''
+        Text boxes of a page. With keep=True the result is kept so a later
+        stage asking for the same page does not lay it out again.
+        '''
+        if page_number in self._text_boxes:
+            boxes = self._text_boxes[page_number]
+            if not keep:
+                del self._text_boxes[page_number]
+            return boxes
+
+        layout = self.layout_page(page_number)
+        if layout is None:
+            return None
+        boxes = text_boxes_from_layout(layout)
+        if keep:
+            self._text_boxes[page_number] = boxes
+        return boxes
+
+    def scan_lines(self, page_number: int) -> Optional[list[ScannedLine]]:
+        '''
+        Text lines of a page read straight from its content stream, without
+        layout analysis. Cheaper than text_boxes (see the class docstring),
+        but positions are only the starting points of the text-showing
+        operators.
+        '''
+        if page_number in self._scanned_lines:
+            return self._scanned_lines[page_number]
+
+        page = self.get_page(page_number)
+        if page is None:
+            return None
+        if self._scan_device is None:
+            # Shares the resource manager, so fonts decoded here are reused by layout.
+            self._scan_device = TextScanDevice(self.resource_manager)
+            self._scan_interpreter = PDFPageInterpreter(self.resource_manager, self._scan_device)
+        with self.metrics.stage("scan") if self.metrics is not None else nullcontext():
+            self._scan_interpreter.process_page(page)
+        lines = self._scan_device.lines
+        self._scan_device.lines = []
+        self._scanned_lines[page_number] = lines
+        return lines
@@ -0,0 +1,220 @@
+#Verizon bill version profiles
+import bisect
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+# Layout of each known Verizon bill version. Callbacks name MyPDFUtils
+# methods so the config stays plain data and can be shared by every parse.
+VZW_PDF_VERSIONS = {
+    "v1": {
+        "dateInit": "01/01/2022",
+        "dateEnd": "12/01/2022",
+        "pagesToParse": [0],
+        "coordinateMaxLimits": {
+            "x1": 385
+        },
+        "contextMap": {
+            ".": {
+                "final": "abcd",
+                "skip": [
+                    "am a test",
+                    "Smartphone"
+                ],
+                "callback": "v1_parseCharges"
+            }
+        }
+    },
+    "v2": {
+        "dateInit": "10/01/2023",
+        "dateEnd": "10/01/2026",
+        "detectVersionFromContent": {
+            "page": 0,
+            "text": "Bill date\nAccount number\nInvoice number\n",
+            "x0": 276,
+            "y0": 215,
+        },
+        "pagesToParse": [2],
+        "locatePages": True,
+        "contextMap": {
+            "Bill summary by line": {
+                "final": "abcd",
+                "skip": [
+                    "am a test",
+                    "Smartphone",
+                    "Questions about your bill?\nverizon.com/support\n800-922-0204",
+                    "Review your bill online",
+                    "An itemized bill breakdown of all\ncharges and credits is available on\nthe My Verizon app and online.",
+                    "Scan the QR code\nwith your camera\napp or go to\ngo.vzw.com/bill.",
+                    "Surcharges, taxes and gov fees",
+                    "New plan added",
+                    "New device added",
+                    "Plan changed",
+                    "Perk added",
+                    "Perk removed",
+                    "Device upgraded",
+                    "Service added",
+                    "Service removed",
+                ],
+                "callback": "v2_parseChargesByLineSummary",
+                "coordinateMaxLimits": {
+                    "x0": 330
+                }
+            }
+        }
+    }
+}
+
+DATE_FORMAT = "%m/%d/%Y"
+
+
+def normalize_text(text: str) -> str:
+    # Collapse whitespace and lowercase for robust matching.
+    return " ".join(text.split()).strip().lower()
+
+
+def squash_text(text: str) -> str:
+    # Drop all whitespace; text-showing operators split words arbitrarily.
+    return "".join(text.split()).lower()
+
+
+@dataclass(frozen=True)
+class ContentDetector:
+    page: int
+    text: str
+    x0: int
+    y0: int
+
+
+@dataclass(frozen=True)
+class ContextProfile:
+    header: str
+    final: str
+    skip: frozenset
+    callback: Optional[str]
+    max_x0: Optional[int] = None
+    max_y0: Optional[int] = None
+    # Header without whitespace, as matched against content stream text.
+    squashed_header: str = ""
+
+
+@dataclass(frozen=True)
+class HeaderTrie:
+    '''
+    Word trie of the normalized context headers, for headers split over
+    several text boxes. Node 0 is the root; children[n] maps the next word
+    to a node and headers[n] is the header that ends at node n, if any.
+    '''
+    children: tuple
+    headers: tuple
+
+    def advance(self, node: int, words) -> int:
+        '''
+        Follow words from node; -1 when they leave the trie.
+        '''
+        for word in words:
+            node = self.children[node].get(word, -1)
+            if node < 0:
+                return -1
+        return node
+
+
+def compile_header_trie(headers) -> HeaderTrie:
+    children = [{}]
+    ends = [None]
+    for header in headers:
+        node = 0
+        for word in normalize_text(header).split():
+            child = children[node].get(word)
+            if child is None:
+                child = len(children)
+                children[node][word] = child
+                children.append({})
+                ends.append(None)
+            node = child
+        if node:
+            ends[node] = header
+    return HeaderTrie(children=tuple(MappingProxyType(c) for c in children), headers=tuple(ends))
+
+
+@dataclass(frozen=True)
+class VersionProfile:
+    name: str
+    date_init: datetime
+    date_end: datetime
+    pages_to_parse: tuple
+    contexts: Mapping[str, ContextProfile]
+    header_trie: HeaderTrie
+    detect: Optional[ContentDetector] = None
+    max_x1: Optional[int] = None
+    # With "locatePages", pagesToParse is only where the locator looks first.
+    locate_pages: bool = False
+
+
+def compile_profile(name: str, config: dict) -> VersionProfile:
+    contexts = {}
+    for header, context_config in config["contextMap"].items():
+        limits = context_config.get("coordinateMaxLimits", {})
+        contexts[header] = ContextProfile(
+            header=header,
+            final=context_config["final"],
+            skip=frozenset(context_config.get("skip", [])),
+            callback=context_config.get("callback"),
+            max_x0=limits.get("x0"),
+            max_y0=limits.get("y0"),
+            squashed_header=squash_text(header),
+        )
+
+    detect = None
+    if "detectVersionFromContent" in config:
+        detect = ContentDetector(**config["detectVersionFromContent"])
+
+    return VersionProfile(
+        name=name,
+        date_init=datetime.strptime(config["dateInit"], DATE_FORMAT),
+        date_end=datetime.strptime(config["dateEnd"], DATE_FORMAT),
+        pages_to_parse=tuple(config["pagesToParse"]),
+        contexts=MappingProxyType(contexts),
+        header_trie=compile_header_trie(contexts),
+        detect=detect,
+        max_x1=config.get("coordinateMaxLimits", {}).get("x1"),
+        locate_pages=config.get("locatePages", False),
+    )
+
+
+def compile_profiles(config: dict) -> tuple:
+    profiles = tuple(compile_profile(name, version_config) for name, version_config in config.items())
+    by_date = sorted(profiles, key=lambda p: p.date_init)
+    for earlier, later in zip(by_date, by_date[1:]):
+        if later.date_init <= earlier.date_end:
+            raise ValueError(f"Version {earlier.name} and {later.name} date ranges overlap")
+    return profiles
+
+
+def config_fingerprint(config: dict) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+PROFILES = compile_profiles(VZW_PDF_VERSIONS)
+PROFILES_BY_NAME = MappingProxyType({p.name: p for p in PROFILES})
+CONFIG_FINGERPRINT = config_fingerprint(VZW_PDF_VERSIONS)
+
+_BY_DATE = sorted(PROFILES, key=lambda p: p.date_init)
+_DATE_INITS = [p.date_init for p in _BY_DATE]
+
+
+def get_profile(name: str) -> VersionProfile:
+    return PROFILES_BY_NAME[name]
+
+
+def profile_for_date(date: datetime) -> Optional[VersionProfile]:
+    '''
+    Find the version whose [dateInit, dateEnd] range contains the bill date.
+    '''
+    index = bisect.bisect_right(_DATE_INITS, date) - 1
+    if index >= 0 and date <= _BY_DATE[index].date_end:
+        return _BY_DATE[index]
+    return None
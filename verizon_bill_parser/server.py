@@ -0,0 +1,230 @@
+#Local HTTP parsing service
+'''
+Serve the parser over HTTP on localhost, so other services can parse bills
+without embedding it:
+
+    verizon-bill-parser-server --port 8765 --workers 4
+
+POST /parse with the PDF as the request body (fileName=MyBill_MM.DD.YYYY.pdf
+in the query string dates the bill) returns the parsed data as JSON.
+GET /healthz reports liveness, GET /metrics the parse metrics in the
+OpenMetrics text format.
+'''
+import argparse
+import asyncio
+import json
+import logging
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from . import __version__
+from .aio import AsyncBillParser
+from .batch import BillResult
+from .cache import ParseCache
+from .metrics import ParseMetrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+# Requests allowed to wait per worker before new ones are turned away.
+QUEUE_PER_WORKER = 4
+
+# Server side counters, name -> help text, exported next to the parse metrics.
+COUNTERS = {
+    "http_requests": "Parse requests received.",
+    "http_rejected": "Parse requests turned away because the queue was full.",
+    "http_timeouts": "Parse requests that timed out.",
+    "http_failures": "Parse requests whose bill could not be parsed.",
+}
+
+
+class BillServer(ThreadingHTTPServer):
+    '''
+    ThreadingHTTPServer in front of an AsyncBillParser. The parser's
+    process pool is started and warmed up once and reused by every request;
+    at most max_queue requests are admitted at a time (running or waiting
+    for a worker), the rest get 503 straight away.
+    '''
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", DEFAULT_PORT), workers: Optional[int] = None,
+                 max_queue: Optional[int] = None, timeout: Optional[float] = 60.0,
+                 max_upload_bytes: int = 20 * 1024 * 1024, max_memory_mb: Optional[int] = None,
+                 cache: Optional[ParseCache] = None):
+        ThreadingHTTPServer.__init__(self, address, BillRequestHandler)
+        self.bill_parser = AsyncBillParser(workers=workers, timeout=timeout, max_memory_mb=max_memory_mb,
+                                           cache=cache, collect_metrics=True)
+        self.max_queue = max_queue if max_queue is not None else self.bill_parser.workers * QUEUE_PER_WORKER
+        self.max_upload_bytes = max_upload_bytes
+        self.metrics = ParseMetrics()
+        self.counters = Counter()
+        self._admitted = threading.BoundedSemaphore(self.max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        # The parser is asyncio based; it gets its own loop thread.
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="bill-parser-loop", daemon=True)
+        self._loop_thread.start()
+
+    def _run(self, coroutine, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def warm_up(self):
+        pids = self._run(self.bill_parser.warm_up())
+        logger.info(f"{len(pids)} parser workers ready")
+
+    def admit(self) -> bool:
+        if not self._admitted.acquire(blocking=False):
+            self.count("http_rejected")
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._admitted.release()
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def parse(self, data: bytes, file_name: Optional[str]) -> BillResult:
+        self.count("http_requests")
+        result = self._run(self.bill_parser.parse_result(data, file_name))
+        with self._lock:
+            if result.metrics is not None:
+                self.metrics.merge(result.metrics)
+        if result.errorType == "TimeoutError":
+            self.count("http_timeouts")
+        elif not result.ok:
+            self.count("http_failures")
+        return result
+
+    def openmetrics(self) -> str:
+        with self._lock:
+            extra = {name: (help_text, self.counters[name]) for name, help_text in COUNTERS.items()}
+            return self.metrics.to_openmetrics(extra=extra)
+
+    def server_close(self):
+        ThreadingHTTPServer.server_close(self)
+        self.bill_parser.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
+
+
+class BillRequestHandler(BaseHTTPRequestHandler):
+    server_version = f"verizon-bill-parser/{__version__}"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload, headers: Optional[dict] = None):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/healthz":
+            self._send_json(200, {"status": "ok", "version": __version__, "workers": self.server.bill_parser.workers,
+                                  "inFlight": self.server.in_flight, "maxQueue": self.server.max_queue})
+        elif path == "/metrics":
+            self._send(200, self.server.openmetrics().encode("utf-8"),
+                       "application/openmetrics-text; version=1.0.0; charset=utf-8")
+        else:
+            self._send_json(404, {"error": f"Unknown path {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/parse":
+            self.close_connection = True
+            return self._send_json(404, {"error": f"Unknown path {url.path}"})
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self.close_connection = True
+            return self._send_json(411, {"error": "Content-Length is required"})
+        length = length.strip()
+        if not (length.isascii() and length.isdigit()):
+            self.close_connection = True
+            return self._send_json(400, {"error": f"Invalid Content-Length {length!r}"})
+        length = int(length)
+        if length > self.server.max_upload_bytes:
+            self.close_connection = True
+            return self._send_json(413, {"error": f"Upload larger than {self.server.max_upload_bytes} bytes"})
+
+        # Read before admission, so slow uploads do not hold queue slots.
+        data = self.rfile.read(length)
+        if len(data) < length:
+            self.close_connection = True
+            return self._send_json(400, {"error": "Request body shorter than Content-Length"})
+        file_name = parse_qs(url.query).get("fileName", [None])[0]
+        if not self.server.admit():
+            return self._send_json(503, {"error": "Too many requests queued"}, {"Retry-After": "1"})
+        error = None
+        try:
+            result = self.server.parse(data, file_name)
+        except Exception as e:
+            logger.exception(f"Parsing {file_name} failed in the server")
+            error = e
+        finally:
+            # Free the slot before answering, so the client never sees it still taken.
+            self.server.release()
+
+        if error is not None:
+            return self._send_json(500, {"fileName": file_name, "error": str(error),
+                                         "errorType": type(error).__name__})
+        if result.ok:
+            self._send_json(200, result.parsedData)
+        else:
+            status = 504 if result.errorType == "TimeoutError" else 422
+            self._send_json(status, {"fileName": result.fileName, "error": result.error,
+                                     "errorType": result.errorType})
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="verizon-bill-parser-server", description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    arg_parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    arg_parser.add_argument("--max-queue", type=int, default=None,
+                            help=f"requests admitted at once (default: {QUEUE_PER_WORKER} per worker)")
+    arg_parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per bill")
+    arg_parser.add_argument("--max-upload-mb", type=int, default=20)
+    arg_parser.add_argument("--max-memory-mb", type=int, default=None, help="address space limit per worker")
+    arg_parser.add_argument("--cache-dir", help="reuse parse results from this cache directory")
+    arg_parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    args = arg_parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(levelname)s %(name)s: %(message)s")
+
+    server = BillServer((args.host, args.port), workers=args.workers, max_queue=args.max_queue,
+                        timeout=args.timeout, max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+                        max_memory_mb=args.max_memory_mb,
+                        cache=ParseCache(args.cache_dir) if args.cache_dir else None)
+    server.warm_up()
+    logger.info(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
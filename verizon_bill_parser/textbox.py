@@ -0,0 +1,48 @@
+#Class TextBox
+from pdfminer.layout import LTTextBoxHorizontal
+
+
+class TextBox:
+    '''
+    The part of a pdfminer LTTextBoxHorizontal the parser actually reads:
+    its text and bounding box. Built as soon as a page is laid out so the
+    LTPage tree (every LTChar with its font and matrix) can be dropped.
+    '''
+    __slots__ = ("text", "x0", "y0", "x1", "y1")
+
+    def __init__(self, text: str, x0: float, y0: float, x1: float, y1: float):
+        self.text = text
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+
+    def __repr__(self):
+        return f"TextBox({self.text!r}, {self.x0}, {self.y0}, {self.x1}, {self.y1})"
+
+    def __eq__(self, other):
+        if not isinstance(other, TextBox):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def get_text(self) -> str:
+        return self.text
+
+    def to_row(self) -> list:
+        return [self.text, self.x0, self.y0, self.x1, self.y1]
+
+    @classmethod
+    def from_row(cls, row) -> "TextBox":
+        return cls(*row)
+
+
+def text_boxes_from_layout(page_layout) -> list[TextBox]:
+    '''
+    Keep the horizontal text boxes of a laid out page, in layout order.
+    Nothing else on the page is used by the parser.
+    '''
+    return [
+        TextBox(element.get_text(), element.x0, element.y0, element.x1, element.y1)
+        for element in page_layout
+        if isinstance(element, LTTextBoxHorizontal)
+    ]
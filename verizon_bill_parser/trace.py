@@ -0,0 +1,34 @@
+#Trace sinks for MyPDFUtils(trace=...)
+import json
+from typing import IO
+
+
+class TraceRecorder:
+    '''
+    Keeps trace events in memory, e.g. to inspect a misparsed bill:
+
+        recorder = TraceRecorder()
+        parser.parse_file("MyBill_10.18.2025.pdf", trace=recorder)
+        recorder.select("skip")
+    '''
+
+    def __init__(self):
+        self.events: list[dict] = []
+
+    def __call__(self, event: dict):
+        self.events.append(event)
+
+    def select(self, event: str) -> list[dict]:
+        return [e for e in self.events if e["event"] == event]
+
+
+class JsonLinesTrace:
+    '''
+    Writes one JSON object per trace event to a text stream.
+    '''
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def __call__(self, event: dict):
+        self.stream.write(json.dumps(event) + "\n")
@@ -0,0 +1,299 @@
+#Class BillWatcher
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TextIO, Union
+
+from .batch import IN_FLIGHT_PER_WORKER, BillResult, _parse_one, default_workers
+from .cache import ParseCache
+from .manifest import BillManifest
+from .parser import walk_pdfs
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlSink:
+    '''
+    Sink appending one JSON object per bill to a file: the parsed data, or
+    {"fileName", "error", "errorType"} for a failed bill. Each line is
+    flushed, and synced when target is a path, before the bill is
+    checkpointed. target may also be an open text stream such as stdout.
+    '''
+
+    def __init__(self, target: Union[str, TextIO]):
+        self._owns_file = isinstance(target, str)
+        self._file = open(target, "a") if self._owns_file else target
+
+    def __call__(self, result: BillResult):
+        if result.ok:
+            record = result.parsedData
+        else:
+            record = {"fileName": result.fileName, "error": result.error, "errorType": result.errorType}
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if self._owns_file:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+
+
+class BillWatcher:
+    '''
+    Watch a folder and parse each new or changed PDF once it is fully
+    written, i.e. its size and mtime have not moved for settle_seconds.
+
+    The folder is polled every poll_interval seconds. Only files whose stat
+    changed since the last poll are looked at again. Every bill parsed
+    successfully is recorded in the checkpoint (a BillManifest, or the path
+    of its SQLite file), so a restarted watcher picks up where it stopped.
+    Failed bills go to the sink but are not checkpointed: the failure may be
+    transient (a download that stalled longer than settle_seconds), so they
+    are parsed again when they change or the watcher restarts.
+
+    A worker that dies takes the pool down with it. The pool is replaced
+    and the bills that were in it are queued again one at a time, before
+    any other bill that is ready, so only a bill that kills a worker on its
+    own is reported as failed (errorType "BrokenProcessPool").
+
+    Stable bills wait in a queue of at most queue_size entries (default
+    IN_FLIGHT_PER_WORKER per worker) for the worker processes. While it is
+    full, further bills stay on disk and are queued by a later poll.
+
+    Results go to sink, a callable taking a BillResult (see JsonlSink).
+    A bill is checkpointed only after sink returns, so delivery is at least
+    once: a bill whose result was emitted just before a crash is emitted
+    again after the restart. If sink raises, the watcher stops without
+    checkpointing that bill.
+    '''
+
+    def __init__(self, directory: str, sink: Callable[[BillResult], None],
+                 checkpoint: Union[str, BillManifest], workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, poll_interval: float = 2.0,
+                 settle_seconds: float = 2.0, recursive: bool = True,
+                 cache: Optional[ParseCache] = None, log_level=logging.ERROR):
+        if not os.path.isdir(directory):
+            raise Exception(f"Directory {directory} does not exist")
+        self.directory = directory
+        self.sink = sink
+        self.workers = workers or default_workers()
+        self.queue_size = queue_size or self.workers * IN_FLIGHT_PER_WORKER
+        if self.queue_size < 1:
+            raise ValueError(f"Invalid queue size: {self.queue_size}")
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.recursive = recursive
+        self.cache = cache
+        self.log_level = log_level
+        self._checkpoint = checkpoint
+        self.manifest: Optional[BillManifest] = None
+        self._owns_manifest = False
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # path -> (size, mtime_ns, monotonic time the stat was first seen)
+        self._unsettled: dict[str, tuple[int, int, float]] = {}
+        # path -> (size, mtime_ns) of bills already delivered or queued
+        self._known: dict[str, tuple[int, int]] = {}
+        # future -> (path, stat, content hash, executor)
+        self._queued: dict[Future, tuple] = {}
+        self._queued_paths: set[str] = set()
+        # Bills that were in a pool when a worker died, and the one running alone.
+        self._suspects: set[str] = set()
+        self._isolated: Optional[str] = None
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        if self.manifest is None:
+            self._owns_manifest = not isinstance(self._checkpoint, BillManifest)
+            self.manifest = BillManifest(self._checkpoint) if self._owns_manifest else self._checkpoint
+        if self._executor is None and self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def stop(self):
+        '''
+        Ask run() to return after the bills in the queue are delivered.
+        Safe to call from another thread or a signal handler.
+        '''
+        self._stop.set()
+
+    def close(self):
+        if self._executor is not None:
+            # Bills still queued are not checkpointed and are parsed again next time.
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._queued.clear()
+        self._queued_paths.clear()
+        self._isolated = None
+        if self.manifest is not None:
+            if self._owns_manifest:
+                self.manifest.close()
+            else:
+                self.manifest.commit()
+            self.manifest = None
+
+    def run(self, max_polls: Optional[int] = None):
+        '''
+        Poll and deliver until stop() is called (or after max_polls polls),
+        then drain the queue.
+        '''
+        self.start()
+        polls = 0
+        while not self._stop.is_set() and (max_polls is None or polls < max_polls):
+            deadline = time.monotonic() + self.poll_interval
+            self.poll()
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                break
+            remaining = deadline - time.monotonic()
+            while remaining > 0 and not self._stop.is_set():
+                self.deliver(timeout=remaining)
+                remaining = deadline - time.monotonic()
+        while self._queued:
+            self.deliver(timeout=None)
+
+    def poll(self) -> int:
+        '''
+        Scan the folder once and queue the bills that have settled, as long
+        as the queue has room. Returns the number of bills queued.
+        '''
+        now = time.monotonic()
+        present = set()
+        ready = []
+        for file_path, stat in walk_pdfs(self.directory, self.recursive):
+            present.add(file_path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._known.get(file_path) == signature:
+                continue
+            unsettled = self._unsettled.get(file_path)
+            if unsettled is None or unsettled[:2] != signature:
+                self._unsettled[file_path] = (*signature, now)
+                if self.settle_seconds > 0 or stat.st_size == 0:
+                    continue
+            elif stat.st_size == 0 or now - unsettled[2] < self.settle_seconds:
+                continue
+            if file_path not in self._queued_paths:
+                # An older version of a file still queued waits for a later poll.
+                ready.append((file_path, stat, signature))
+
+        # Forget files deleted or renamed before they settled.
+        for file_path in self._unsettled.keys() - present:
+            del self._unsettled[file_path]
+        for file_path in self._known.keys() - present:
+            del self._known[file_path]
+        self._suspects &= present
+
+        # Settled suspects run one at a time on an empty pool, before any
+        # other bill; suspects still being written hold nothing back.
+        suspects = [item for item in ready if item[0] in self._suspects]
+        if suspects:
+            ready = suspects if not self._queued else []
+        queued = 0
+        for file_path, stat, signature in ready:
+            if self._isolated is not None or len(self._queued) >= self.queue_size:
+                # Backpressure: leave the rest on disk for a later poll.
+                break
+            del self._unsettled[file_path]
+            self._known[file_path] = signature
+            known, content_hash = self.manifest.lookup(file_path, stat)
+            if known is not None and known.ok:
+                # Checkpointed meanwhile, e.g. by another watcher sharing the checkpoint.
+                self._suspects.discard(file_path)
+                continue
+            if file_path in self._suspects:
+                self._isolated = file_path
+            self._submit(file_path, stat, content_hash)
+            queued += 1
+        if queued:
+            logger.debug(f"Queued {queued} bills from {self.directory}, {len(self._queued)} in the queue")
+        return queued
+
+    def _submit(self, file_path: str, stat: os.stat_result, content_hash: str):
+        if self._executor is None:
+            future = Future()
+            future.set_result(_parse_one(file_path, self.log_level, self.cache))
+        else:
+            future = self._executor.submit(_parse_one, file_path, self.log_level, self.cache)
+        self._queued[future] = (file_path, stat, content_hash, self._executor)
+        self._queued_paths.add(file_path)
+
+    def deliver(self, timeout: Optional[float] = 0.0) -> int:
+        '''
+        Wait up to timeout seconds for queued bills, send the finished ones
+        to the sink and checkpoint the successful ones. Returns the number
+        delivered.
+        '''
+        if not self._queued:
+            if timeout:
+                self._stop.wait(timeout)
+            return 0
+        done, _ = wait(self._queued, timeout=timeout, return_when=FIRST_COMPLETED)
+        delivered = 0
+        for future in done:
+            file_path, stat, content_hash, executor = self._queued.pop(future)
+            self._queued_paths.discard(file_path)
+            alone = file_path == self._isolated
+            if alone:
+                self._isolated = None
+                self._suspects.discard(file_path)
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                if executor is self._executor:
+                    logger.warning("A worker process died, replacing the pool")
+                    executor.shutdown(wait=False)
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                if not alone:
+                    # Not checkpointed: a later poll queues it again, on its own.
+                    self._suspects.add(file_path)
+                    self._known.pop(file_path, None)
+                    continue
+                result = BillResult(fileName=file_path, error=str(error) or "Worker process died",
+                                    errorType=type(error).__name__)
+            else:
+                result = future.result()
+
+            if not result.ok:
+                logger.warning(f"Failed to parse {file_path}: {result.error}")
+            self.sink(result)
+            delivered += 1
+            if result.ok:
+                self.manifest.record(file_path, stat, content_hash, result)
+                self.manifest.commit()
+        return delivered
+
+
+def watch_directory(directory: str, sink: Union[str, TextIO, Callable[[BillResult], None]],
+                    checkpoint: Union[str, BillManifest], **kwargs):
+    '''
+    Run a BillWatcher on directory until interrupted. sink is a callable
+    taking a BillResult, or a JSONL file path or text stream to append to;
+    the other keyword arguments go to BillWatcher.
+    '''
+    jsonl_sink = None if callable(sink) else JsonlSink(sink)
+    try:
+        with BillWatcher(directory, jsonl_sink or sink, checkpoint, **kwargs) as watcher:
+            # SIGTERM drains the queue like stop(); Ctrl-C abandons it.
+            in_main_thread = threading.current_thread() is threading.main_thread()
+            if in_main_thread:
+                previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
+            try:
+                watcher.run()
+            except KeyboardInterrupt:
+                logger.info(f"Stopped watching {directory}")
+            finally:
+                if in_main_thread:
+                    signal.signal(signal.SIGTERM, previous_handler)
+    finally:
+        if jsonl_sink is not None:
+            jsonl_sink.close()